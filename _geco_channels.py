@@ -0,0 +1,3427 @@
+#!/usr/bin/env python
+
+import re
+import bisect
+import functools
+import itertools
+import operator
+import os
+import sys
+# modules that are only needed by some features (json, fnmatch, array, mmap,
+# struct, sqlite3, argparse, http, asyncio) are imported where they are used,
+# to keep command line startup fast.
+
+# note to maintainers: please modify LAST_UPDATED and __version__ when
+# changing anything. use the __run_tests__() method to make sure everything
+# is working as expected.
+
+__authors__ = ['Stefan Countryman']
+DESC="""A script/module for querying timing channels. Reference is always made
+to a physical layout, where Master/FanOut modules have slave devices connected
+to them, and additional timing diagnostic devices exist. This is by analogy to
+MEDM screens. All devices are represented internally as strings, which are kept
+as close in form as possible to valid, descriptive EPICS channel names for
+each device, in order to facilitate intuitive debugging, device comparisons,
+and declarations of timing-system layout.
+"""
+# Data about the current timing configuration at each site is kept in per-site
+# JSON files in the data directory (see SITE_DATA_FILES), which are only read
+# when that site is asked for.
+__version__ = 0.6
+LAST_UPDATED = 'Sat Oct 17 02:30:00 EDT 2026'
+PORTS_PER_MFO = 16
+# what types of slaves are there?
+SLAVE_TYPES = ['CFC','DUOTONE','FANOUT','IRIGB','XOLOCK']
+# can't use these characters in device types or descriptions, since they are
+# used as delimiters in the internal string representation:
+RESERVED_CHARS = set(';:,')
+# what are the acceptable channel suffixes for each slave device? used to
+# generate possible channel names for a given configuration.
+CHANNEL_SUFFIXES = {
+    'mfo_common': [
+        'COMERR',
+        'COMERRCOUNT',
+        'CRCERR',
+        'CRCERRCOUNT',
+        'COMMISSING',
+        'COMMISSCOUNT',
+        'DOWNTIME',
+        'COMCOUNT',
+        'COMLENGTH',
+        'DIP',
+        'VCXOCTRL',
+        'OCXOCTRL',
+        'OCXOERR',
+        'UPLINKDELAY',
+        'EXTPPSDELAY',
+        'GPSDELAY',
+        'TIMINGTOLERANCE',
+        'UPLINKUP',
+        'USEUPLINK',
+        'UPLINKLOS',
+        'UPLINKERRCOUNT',
+        'UPLINKCRCERRCOUNT',
+        'BOARDID',
+        'BOARDREV',
+        'SERIAL',
+        'CODEID',
+        'CODEREV',
+        'GPS',
+        'STRADDR',
+        'NAME',
+        'ISMASTER',
+        'HASFANOUT',
+        'FANOUTPORTS',
+        'HASOCXO',
+        'HASEXTPPS',
+        'HASGPS',
+        'USEEXT',
+        'USEGPS',
+        'GPSLOCKED',
+        'OCXOLOCKED'
+    ],
+    'mfo_port_related': [
+        'ACTIVE',
+        'DELAYERR',
+        'ERROR_FLAG',
+        'LOS',
+        'MEASUREDDELAY',
+        'MISSING',
+        'UP'
+    ],
+    'slave_common': [
+        'SLAVE_ADDR',
+        'SLAVE_BOARDID',
+        'SLAVE_BOARDREV',
+        'SLAVE_CODEID',
+        'SLAVE_CODEREV',
+        'SLAVE_DIP',
+        'SLAVE_ERROR_FLAG',
+        'SLAVE_ERROR_MSG',
+        'SLAVE_GPS',
+        'SLAVE_ID',
+        'SLAVE_ISCFC',
+        'SLAVE_ISDUOTONE',
+        'SLAVE_ISFANOUT',
+        'SLAVE_ISIRIGB',
+        'SLAVE_ISXOLOCKING',
+        'SLAVE_NAME',
+        'SLAVE_SERIAL',
+        'SLAVE_STRADDR',
+        'SLAVE_UPLINKCRCERRCOUNT',
+        'SLAVE_UPLINKERRCOUNT',
+        'SLAVE_UPLINKLOS',
+        'SLAVE_UPLINKUP',
+        'SLAVE_VCXOCTRL'
+    ],
+    'CFC': [
+        'SLAVE_CFC_FREQUENCY_1',
+        'SLAVE_CFC_FREQUENCY_2',
+        'SLAVE_CFC_FREQUENCY_3',
+        'SLAVE_CFC_FREQUENCY_4',
+        'SLAVE_CFC_FREQUENCY_5',
+        'SLAVE_CFC_FREQUENCY_6',
+        'SLAVE_CFC_HASINPUT',
+        'SLAVE_CFC_TIMEDIFF_1',
+        'SLAVE_CFC_TIMEDIFF_2',
+        'SLAVE_CFC_TIMEDIFF_3',
+        'SLAVE_CFC_TIMEDIFF_4',
+        'SLAVE_CFC_TIMEDIFF_5',
+        'SLAVE_CFC_TIMEDIFF_6',
+        'SLAVE_CFC_TIMEDIFF_7'
+    ],
+    'DUOTONE': [
+    ],
+    'FANOUT': [
+        'SLAVE_FANOUT_DELAYERR',
+        'SLAVE_FANOUT_EXTPPSDELAY',
+        'SLAVE_FANOUT_FANOUTLOS',
+        'SLAVE_FANOUT_FANOUTPORTS',
+        'SLAVE_FANOUT_FANOUTUP',
+        'SLAVE_FANOUT_GPSDELAY',
+        'SLAVE_FANOUT_GPSERR',
+        'SLAVE_FANOUT_GPSERRCOUNT',
+        'SLAVE_FANOUT_GPSLOCKED',
+        'SLAVE_FANOUT_HASEXTPPS',
+        'SLAVE_FANOUT_HASFANOUT',
+        'SLAVE_FANOUT_HASGPS',
+        'SLAVE_FANOUT_HASOCXO',
+        'SLAVE_FANOUT_ISMASTER',
+        'SLAVE_FANOUT_MISSING',
+        'SLAVE_FANOUT_OCXOCTRL',
+        'SLAVE_FANOUT_OCXOERR',
+        'SLAVE_FANOUT_OCXOLOCKED',
+        'SLAVE_FANOUT_UPLINKDELAY',
+        'SLAVE_FANOUT_USEEXT',
+        'SLAVE_FANOUT_USEGPS',
+        'SLAVE_FANOUT_USEUPLINK'
+    ],
+    'IRIGB': [
+        'SLAVE_IRIGB_DST',
+        'SLAVE_IRIGB_IRIGDIFFA',
+        'SLAVE_IRIGB_IRIGDIFFB',
+        'SLAVE_IRIGB_IRIGDIFFC',
+        'SLAVE_IRIGB_IRIGERRCOUNTA',
+        'SLAVE_IRIGB_IRIGERRCOUNTB',
+        'SLAVE_IRIGB_IRIGERRCOUNTC',
+        'SLAVE_IRIGB_LEAPPEND',
+        'SLAVE_IRIGB_LEAPSEC',
+        'SLAVE_IRIGB_LEAPSUB',
+        'SLAVE_IRIGB_TIMEZONE'
+    ],
+    'XOLOCK': [
+        'SLAVE_XOLOCK_HASOCXO',
+        'SLAVE_XOLOCK_MEASUREDFREQ',
+        'SLAVE_XOLOCK_OCXOCTRL',
+        'SLAVE_XOLOCK_OCXOERR',
+        'SLAVE_XOLOCK_OCXOLOCKED',
+        'SLAVE_XOLOCK_PRESETFREQ'
+    ]
+}
+
+# channel name templates, built once at import. each template is appended to
+# the portless_name() of an MFO to give a full channel name. MFO templates
+# cover the MFO's common channels and its per-port channels; slave templates
+# are keyed by (port number, slave type).
+MFO_CHANNEL_TEMPLATES = tuple(
+    ['_' + x for x in CHANNEL_SUFFIXES['mfo_common']]
+    + ['_PORT_' + str(i) + '_' + x for i in range(PORTS_PER_MFO)
+       for x in CHANNEL_SUFFIXES['mfo_port_related']])
+SLAVE_CHANNEL_TEMPLATES = dict(
+    ((i, dev_type), tuple('_PORT_' + str(i) + '_' + x
+                          for x in (CHANNEL_SUFFIXES['slave_common']
+                                    + CHANNEL_SUFFIXES[dev_type])))
+    for i in range(PORTS_PER_MFO) for dev_type in SLAVE_TYPES)
+# every template that could apply to an MFO, whatever is connected to its
+# ports, in order and with duplicates removed.
+ALL_POSSIBLE_CHANNEL_TEMPLATES = tuple(dict.fromkeys(
+    MFO_CHANNEL_TEMPLATES
+    + tuple(x for i in range(PORTS_PER_MFO) for dev_type in SLAVE_TYPES
+            for x in SLAVE_CHANNEL_TEMPLATES[(i, dev_type)])))
+# how many devices' expanded channel tuples to keep memoized. the installed
+# system only has a few hundred devices, but this keeps memory bounded when
+# expanding very large (e.g. synthetic) systems.
+CHANNEL_CACHE_SIZE = 4096
+
+@functools.lru_cache(maxsize=CHANNEL_CACHE_SIZE)
+def _expand_channels(prefix, slave_key=None):
+    """Return the tuple of channel names made by appending each template to
+    prefix: the MFO templates, or, if slave_key is given, the slave templates
+    for that (port number, slave type). Results are memoized per device."""
+    if slave_key is None:
+        templates = MFO_CHANNEL_TEMPLATES
+    else:
+        templates = SLAVE_CHANNEL_TEMPLATES[slave_key]
+    return tuple(prefix + x for x in templates)
+
+class MEDMScreen(str):
+    """An abstract class for strings representing MEDM screens.
+    """
+    def get_own_channels(self):
+        """Return a list of all channels in use by this device but not its
+        children."""
+        return []
+    def get_child_channels(self):
+        """Return a list of all channels in use by this device's child
+        devices, if they exist (otherwise, return an empty list)."""
+        return []
+    def get_channels(self):
+        """Return a list of all channels in use by this device as well as any
+        connected child devices."""
+        return list(self.iter_channels())
+    def iter_own_channels(self):
+        """Return an iterator over the channels that get_own_channels() would
+        return."""
+        return iter(self.get_own_channels())
+    def iter_child_channels(self):
+        """Return an iterator over the channels that get_child_channels()
+        would return."""
+        return iter(self.get_child_channels())
+    def iter_channels(self):
+        """Yield all channels in use by this device followed by those of any
+        connected child devices, without building the full list first."""
+        for ch in self.iter_own_channels():
+            yield ch
+        for ch in self.iter_child_channels():
+            yield ch
+
+class DiagnosticScreen(MEDMScreen):
+    """An abstract class for strings representing diagnostic MEDM screens.
+    """
+
+class GPSScreen(DiagnosticScreen):
+    """An abstract class for strings representing diagnostic information for
+    GPS clocks.
+    """
+
+class TopMEDMScreen(MEDMScreen):
+    """An abstract class for strings representing top-level MEDM screens.
+    """
+
+class TimingSlave(MEDMScreen):
+    """Any type of device that can get its timing signal from a timing
+    Master/FanOut. Is represented as a string starting with the string
+    representation of the MFO to which is connected and ending with a colon
+    followed by the port this Slave connects to. For example, a DuoTone
+    connected to the first port (port 0) of a Master (with no other devices
+    connected) is represented by:
+
+        'H1:SYS-TIMING_C_MA_A;:DUOTONE;,;,;,;,;,;,;,;,;,;,;,;,;,;,;,;:0'
+
+    If a TimingSlave is set at a port on the MFO where no device is connected,
+    as in the following example, the resulting TimingSlave will have a
+    dev_type set to None.
+
+        'H1:SYS-TIMING_C_MA_A;:DUOTONE;,;,;,;,;,;,;,;,;,;,;,;,;,;,;,;:1'
+
+    """
+    def record(self):
+        """Return the parsed SlaveRecord for this Timing Slave. The string is
+        only decoded the first time this is called; all other accessors are
+        served from the fields of the returned record."""
+        try:
+            return self._record
+        except AttributeError:
+            self._record = SlaveRecord(self)
+            return self._record
+    def mfo(self):
+        """Return the Master/FanOut that this timing slave is connected to."""
+        return self.record().mfo
+    def port_number(self):
+        """Return the number of the port on the Master/FanOut that this Timing
+        Slave device is connected to."""
+        return self.record().port_number
+    def __dev__(self):
+        """Split up this device's string into device type and, if included, a
+        device description."""
+        return list(self.record().dev)
+    def dev_type(self):
+        """Get the device type of this Timing Slave."""
+        dev_type = self.record().dev[0]
+        if dev_type == '':
+            return None
+        else:
+            if dev_type in SLAVE_TYPES:
+                return dev_type
+            else:
+                raise ValueError('Not a Timing Slave device type: ' + dev_type)
+    def description(self):
+        """Get the description for this Timing Slave, if it exists. If this
+        device does not exist, return None. If this device has no description,
+        return an empty string."""
+        if self.dev_type() is None:
+            return None
+        else:
+            dev = self.record().dev
+            if len(dev) == 2:
+                return dev[1]
+            else:
+                raise ValueError('Wrong number of items in device string: ' 
+                                 + ';'.join(dev))
+    def get_own_channels(self):
+        """Return a list of all channel names associated with this Timing Slave
+        (note that, if this slave happens to be a FanOut, it will have its
+        own diagnostic channels, along with channels for its own Slaves; these
+        will only be accessible if the fanout is treated separately as an MFO.
+        This parallels the way channels and devices are treated in MEDM screens
+        on site. See TimingTopology for following FanOuts downstream.)"""
+        return list(self.__own_channels__())
+    def iter_own_channels(self):
+        """Return an iterator over this Timing Slave's own channels."""
+        return iter(self.__own_channels__())
+    def __own_channels__(self):
+        """Return the memoized tuple of this Timing Slave's own channels."""
+        return _expand_channels(self.mfo().portless_name(),
+                                (self.port_number(), self.dev_type()))
+    def name(self):
+        """Return a string which describes this device in human-readable form
+        but which does not uniquely specify its MFO configuration nor provide
+        the basis for generating usable EPICS channel names (though it does
+        come close)."""
+        return (self.mfo().portless_name() + '_PORT_' + str(self.port_number())
+                + '_SLAVE_' + self.dev_type())
+
+class MFO(TopMEDMScreen):
+    """A Master/FanOut device, as seen in MEDM screens. This type of object
+    also uniquely specifies the devices connected to this MFO's ports using
+    a comma-delimited list of connected devices following a colon at the end of
+    the string representation. An example with a DuoTone connected to port 0
+    and FanOut connected to port 4 looks like:
+
+        'H1:SYS-TIMING_C_MA_A;:DUOTONE;,;,;,;,;FANOUT;,;,;,;,;,;,;,;,;,;,;,;'
+
+    Each Timing Slave can have an optional description following the device
+    type and separated with a semicolon. Note that this description cannot
+    contain the following characters:
+
+        ;:,
+
+    since they are used syntactically within the string. Starting from the
+    above example, the FanOut connected to port 4 could be described as "test
+    stand" using the following string:
+
+        'H1:SYS-TIMING_C_MA_A;:;,;,;,;,;FANOUT;test stand,;,;,;,;,;,;,;,;,;,;,;'
+
+    The MFO itself can also have a device description, given after the portless
+    name of the MFO and separated by a semicolon, as in the following:
+
+        'H1:SYS-TIMING_C_MA_A;corner msr:,;,;,;,;FANOUT;,;,;,;,;,;,;,;,;,;,;,;'
+
+    Even if a description is not present, the semicolons remain in place to
+    ensure the uniqueness of any given string representation.
+    """
+    def record(self):
+        """Return the parsed MFORecord for this MFO. The string is only
+        decoded the first time this is called; all other accessors are served
+        from the fields of the returned record."""
+        try:
+            return self._record
+        except AttributeError:
+            self._record = MFORecord(self)
+            return self._record
+    def ifo(self):
+        """Return the Interferometer for the MFO that this string describes."""
+        return self.record().ifo
+    def subsystem(self):
+        """Return the Subsystem (should be SYS-TIMING) for the MFO that this
+        string describes."""
+        return self.record().subsystem
+    def location(self):
+        """Return the Location (Corner Station, X-End, or Y-End) for the MFO
+        that this string describes."""
+        return self.record().location
+    def m_or_f(self):
+        """Return whether the MFO that this string describes is a Master (M) or
+        FanOut (F)."""
+        return self.record().m_or_f
+    def dev_id(self):
+        """There can be multiple FanOuts in a given location. We distinguish
+        between them by assigning letters, starting at A. Return the device ID
+        letter for the device that this string describes."""
+        return self.record().dev_id
+    def port(self, start=None, stop=None, step=None):
+        """There are 16 ports, numbered 0-15, to which Timing Slave modules can
+        be connected by fiber link. Return the Timing Slavee connected to a
+        particular port. A slice of ports can be taken using syntax similar to
+        that of range(start(, stop(, step))), where out-of-bounds indices are
+        automatically and silently truncated and a list of results is returned.
+        If no argument is given, return all devices."""
+        if start is None:
+            return [self.__slave__(i) for i in range(0, PORTS_PER_MFO)]
+        if stop is None:
+            return self.__slave__(start)
+        else:
+            if step is None:
+                step = 1
+            if stop > PORTS_PER_MFO:
+                stop = PORTS_PER_MFO
+            if start < 0:
+                start = 0
+            return [self.__slave__(i) for i in range(start, stop, step)]
+    def __slave__(self, i):
+        """Return the TimingSlave on port i, with its parsed record filled in
+        from this MFO's record so that the slave string is never re-split."""
+        slave = TimingSlave(str(self) + ':' + str(i))
+        if 0 <= i < len(self.record().ports):
+            slave._record = SlaveRecord.from_mfo(self, i)
+        return slave
+    def portless_name(self):
+        """Return a string representing this MFO but with no information about
+        used ports and no channel description. This is not a valid MFO object,
+        but can be used to construct valid EPICS channels."""
+        return self.record().portless_name
+    def description(self):
+        """If this MFO has a description string, return it. Otherwise, return
+        an empty string."""
+        description = self.record().description
+        if description is None:
+            raise ValueError('Wrong number of items in mfo string: ' 
+                             + str(self))
+        return description
+    def get_own_channels(self):
+        """Get a list of channels related to this MFO, ignoring any channels
+        related to Timing Slave devices attached to this MFO."""
+        return list(self.__own_channels__())
+    def iter_own_channels(self):
+        """Return an iterator over this MFO's own channels."""
+        return iter(self.__own_channels__())
+    def __own_channels__(self):
+        """Return the memoized tuple of this MFO's own channels."""
+        return _expand_channels(self.portless_name())
+    def get_child_channels(self):
+        """Get a list of channels in use by this MFO's attached slaves. Does
+        not include channels relating to this MFO; returns only Slave-related
+        channels."""
+        return list(self.iter_child_channels())
+    def iter_child_channels(self):
+        """Yield the channels in use by this MFO's attached slaves one slave at
+        a time, without building the full list first."""
+        for i in range(PORTS_PER_MFO):
+            slave = self.port(i)
+            if not slave.dev_type() is None:
+                for ch in slave.iter_channels():
+                    yield ch
+    def slave_types(self):
+        """Return a set of slave types connected to this device."""
+        return set([slave.dev_type() for slave in self.port()])
+    def used_ports(self):
+        """Return a list of ports used by this device."""
+        res = []
+        for slave in self.port():
+            if not slave.dev_type() is None:
+                res.append(slave.port_number())
+        return res
+    def to_dict(self):
+        """Return a dictionary representing this MFO. good for implementing
+        various serialization strategies."""
+        return {
+            'ifo': self.ifo(),
+            'subsystem': self.subsystem(),
+            'location': self.location(),
+            'm_or_f': self.m_or_f(),
+            'dev_id': self.dev_id(),
+            'description': self.description(),
+            'ports': [{
+                'dev_type': self.port(i).dev_type(),
+                'description': self.port(i).description()
+            } for i in range(PORTS_PER_MFO)]
+        }
+    def to_json(self):
+        """Return a pretty-formatted JSON string representing this MFO."""
+        import json
+        return json.dumps(self.to_dict(), indent=4, separators=(',', ': '))
+    @classmethod
+    def from_dict(cls, d):
+        """Construct an MFO object from a dictionary."""
+        mfo_str = (d['ifo'] + ':' + '_'.join([d['subsystem'], d['location'],
+                                         d['m_or_f'],d['dev_id']])
+             + ';' + d['description'] + ':')
+        # unused ports show up as None, but are represented as empty strings
+        ports = []
+        for p in d['ports']:
+            if p['dev_type'] is None and p['description'] is None:
+                ports.append({'dev_type': '', 'description': ''})
+            elif p['dev_type'] is None or p['description'] is None:
+                raise ValueError(('Bad MFO description: either dev_type and '
+                                  'description are both None, or both are '
+                                  'nonempty strings.'))
+            elif any((c in RESERVED_CHARS) for c in p['dev_type']):
+                raise ValueError(('Cannot use reserved chars '
+                                  + ''.join(RESERVED_CHARS)
+                                  + ' in dev_type: ' + p['dev_type']))
+            elif any((c in RESERVED_CHARS) for c in p['description']):
+                raise ValueError(('Cannot use reserved chars '
+                                  + ''.join(RESERVED_CHARS)
+                                  + ' in description: ' + p['description']))
+            else:
+                ports.append({'dev_type':    p['dev_type'],
+                              'description': p['description']})
+        ports_str = [p['dev_type'] + ';' + p['description']
+                     for p in ports]
+        port_str = ','.join(ports_str)
+        return cls(mfo_str + port_str)
+    @classmethod
+    def from_json(cls, json_str):
+        """Construct an MFO object from a JSON-formatted string."""
+        import json
+        return cls.from_dict(json.loads(json_str))
+
+class MFORecord(object):
+    """The decoded fields of an MFO string. The string form of an MFO remains
+    its canonical identity; this record just saves us from re-splitting that
+    string every time one of its fields is needed. For the MFO
+
+        'H1:SYS-TIMING_C_MA_A;corner msr:,;,;,;,;FANOUT;,;,;,;,;,;,;,;,;,;,;,;'
+
+    the record has ifo 'H1', subsystem 'SYS-TIMING', location 'C', m_or_f 'MA',
+    dev_id 'A', portless_name 'H1:SYS-TIMING_C_MA_A', description
+    'corner msr', and ports holding the ';'-split device string for each of
+    the 16 ports (e.g. ('FANOUT', '') for port 4). If the description part of
+    the string is malformed, description is None.
+    """
+    __slots__ = ('ifo', 'subsystem', 'location', 'm_or_f', 'dev_id',
+                 'portless_name', 'description', 'ports')
+    def __init__(self, mfo_str):
+        fields = mfo_str.split(':')
+        name = fields[1].split('_')
+        named = ':'.join(fields[0:2]).split(';')
+        self.ifo = fields[0]
+        self.subsystem = name[0]
+        self.location = name[1]
+        self.m_or_f = name[2]
+        # leave out the description for this MFO, which can follow the dev_id
+        # and is separated by a semicolon (when present).
+        self.dev_id = name[3].split(';')[0]
+        self.portless_name = named[0]
+        self.description = named[1] if len(named) == 2 else None
+        if len(fields) > 2:
+            self.ports = tuple(tuple(p.split(';'))
+                               for p in fields[2].split(','))
+        else:
+            self.ports = ()
+    def encode(self):
+        """Return the canonical MFO string that this record was decoded
+        from."""
+        return (self.portless_name + ';' + self.description + ':'
+                + ','.join(';'.join(p) for p in self.ports))
+
+class SlaveRecord(object):
+    """The decoded fields of a TimingSlave string: the MFO object the slave
+    is connected to, the port number, and the ';'-split device string
+    (device type and description) for that port.
+    """
+    __slots__ = ('mfo', 'port_number', 'dev')
+    def __init__(self, slave_str=None):
+        if slave_str is not None:
+            fields = slave_str.split(':')
+            self.mfo = MFO(':'.join(fields[0:3]))
+            self.port_number = int(fields[3])
+            self.dev = self.mfo.record().ports[self.port_number]
+    @classmethod
+    def from_mfo(cls, mfo, port_number):
+        """Build the record for the slave on a given port of an MFO directly
+        from the MFO's own record, without touching any strings."""
+        rec = cls()
+        rec.mfo = mfo
+        rec.port_number = port_number
+        rec.dev = mfo.record().ports[port_number]
+        return rec
+
+class PPS(TopMEDMScreen, DiagnosticScreen):
+    """Channels associated with 1PPS diagnostic summary screen. A curated
+    subset of Comparator channels, each with its own description to aid in
+    diagnostic work.
+    """
+    # TODO: flesh out.
+
+class CNS(TopMEDMScreen, GPSScreen):
+    """Channels associated with CNS Clock diagnostics.
+    """
+    # TODO: flesh out.
+
+class Trimble(TopMEDMScreen, GPSScreen):
+    """Channels associated with Trimble Clock diagnostics.
+    """
+    # TODO: flesh out.
+
+# the installed configuration at each site is kept in a JSON file in the data
+# directory next to this script (following symlinks to it), holding a list of
+# MFO dictionaries in the format used by MFO.to_dict(). please update
+# LAST_UPDATED when editing these.
+SITE_DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             'data')
+SITE_DATA_FILES = {
+    'LHO': 'timing-system-LHO.json',
+    'LLO': 'timing-system-LLO.json'
+}
+
+def load_timing_system(path):
+    """Construct a list of top-level MEDM objects from a JSON file holding a
+    list of MFO dictionaries, like the per-site files in SITE_DATA_DIR."""
+    import json
+    with open(path) as infile:
+        return [MFO.from_dict(d) for d in json.load(infile)]
+
+def site_data_stamp():
+    """Return a string recording the size and modification time of each
+    site data file, which the SQLite store and binary snapshot keep so that
+    they are rebuilt when the data files are edited."""
+    stamps = []
+    for site in sorted(SITE_DATA_FILES):
+        stat = os.stat(os.path.join(SITE_DATA_DIR, SITE_DATA_FILES[site]))
+        stamps.append('{} {} {}'.format(site, stat.st_size, stat.st_mtime_ns))
+    return ';'.join(stamps)
+
+def _load_site(site):
+    """Construct the list of top-level MEDM objects for the given site from
+    its data file. Use site_timing_system() instead, which only does this
+    once."""
+    return load_timing_system(os.path.join(SITE_DATA_DIR,
+                                           SITE_DATA_FILES[site]))
+
+# the installed site models are loaded lazily, the first time they are asked
+# for, and kept here as tuples so that nobody can modify the cached copy.
+_SITE_CACHE = {}
+# which site each interferometer is at.
+IFO_SITES = {
+    'H1': 'LHO',
+    'L1': 'LLO'
+}
+
+def site_timing_system(site):
+    """Return a tuple of top-level MEDM objects representing the timing
+    system as installed at the given site ('LHO' or 'LLO'). The model is
+    loaded from the site's data file on the first call and served from a
+    cache afterwards (so other sites' data files are never read); call
+    clear_timing_system_cache() or reload_timing_system() to rebuild it."""
+    try:
+        return _SITE_CACHE[site]
+    except KeyError:
+        model = _SITE_CACHE[site] = tuple(_load_site(site))
+        return model
+
+def clear_timing_system_cache(site=None):
+    """Forget the cached model for the given site, or for all sites if no site
+    is given. The model will be rebuilt the next time it is requested."""
+    if site is None:
+        _SITE_CACHE.clear()
+    else:
+        _SITE_CACHE.pop(site, None)
+    # channel universes, resolvers, topologies and query indexes are built
+    # from the site models, so they go too.
+    _UNIVERSE_CACHE.clear()
+    _RESOLVER_CACHE.clear()
+    _TOPOLOGY_CACHE.clear()
+    _QUERY_CACHE.clear()
+
+def reload_timing_system(site=None):
+    """Rebuild the cached model for the given site (or for all sites if no
+    site is given) immediately."""
+    clear_timing_system_cache(site)
+    for s in (SITE_DATA_FILES if site is None else [site]):
+        site_timing_system(s)
+
+def lho_timing_system():
+    """Return a list of top-level MEDM objects representing the timing
+    system as installed at LIGO Hanford Observatory (LHO)."""
+    return list(site_timing_system('LHO'))
+
+def llo_timing_system():
+    """Return a list of top-level MEDM objects representing the timing
+    system as installed at LIGO Livingston Observatory (LLO)."""
+    return list(site_timing_system('LLO'))
+
+def aligo_timing_system():
+    """Return a list of top-level MEDM objects representing the timing
+    system as installed at all LIGO observatories."""
+    return list(site_timing_system('LHO') + site_timing_system('LLO'))
+
+def all_possible_channels(mfo_list):
+    """Return a list of top-level MEDM objects the union of whose channel
+    names provide a comprehensive list of all possible valid channel names
+    for every possible configuration of the timing system. Is unique up to
+    MFO configuration. If you only want the channel names themselves, use
+    iter_all_possible_channels() instead."""
+    all_mfo = []
+    for mfo in mfo_list:
+        # every port gets a dummy device of the same type; the slave types
+        # are known to be valid, so we can skip from_dict's validation.
+        head = mfo.portless_name() + ';' + mfo.description() + ':'
+        for slave in SLAVE_TYPES:
+            ports = ','.join([slave + ';dummy dev'] * PORTS_PER_MFO)
+            all_mfo.append(MFO(head + ports))
+    return all_mfo
+
+def iter_all_possible_channels(mfo_list):
+    """Yield each channel name that could exist for any possible arrangement
+    of slaves on the given MFOs exactly once. This is the same set of names
+    that the MFOs returned by all_possible_channels() would produce, but it is
+    generated straight from each MFO's name and the channel templates, without
+    building any dummy MFOs or repeating the channels that are common to
+    every slave type."""
+    seen = set()
+    for mfo in mfo_list:
+        prefix = mfo.portless_name()
+        if prefix in seen:
+            continue
+        seen.add(prefix)
+        for template in ALL_POSSIBLE_CHANNEL_TEMPLATES:
+            yield prefix + template
+
+# the name of the FanOut fed by a FANOUT slave is given at the end of that
+# slave's description, e.g. 'CER-SUS C_FO_B' or 'EX X_FO_A'.
+FANOUT_TARGET = re.compile(r'(?:^|\s)([A-Z0-9]+_(?:MA|FO)_[A-Z0-9]+)$')
+
+class TimingTopology(object):
+    """The tree (or forest) formed by a list of MFOs, where each FANOUT slave
+    is linked to the downstream MFO that it feeds. The downstream MFO is found
+    from the end of the slave's description, which names it by location,
+    m_or_f and device ID (as in 'EX X_FO_A'); FANOUT slaves whose
+    descriptions don't name an MFO in the list (like 'DTS') have no
+    downstream MFO. Every MFO that isn't fed by another is a root, normally
+    the Master for an interferometer.
+
+    MFOs are laid out in depth-first order when the topology is built, and
+    each MFO's ancestors and its span in that order are recorded, so finding
+    everything upstream or downstream of a device takes time proportional to
+    the size of the answer:
+
+        topology = timing_topology()
+        master = topology.roots[0]
+        channels = list(topology.downstream_channels(master))
+        topology.path_to_root(some_comparator)
+    """
+    def __init__(self, mfo_list):
+        self.mfos = list(mfo_list)
+        by_name = dict((mfo.portless_name(), mfo) for mfo in self.mfos)
+        self.feeds = {}
+        self.fed_by = {}
+        self.child_slaves = dict((mfo, []) for mfo in self.mfos)
+        for mfo in self.mfos:
+            prefix = mfo.ifo() + ':' + mfo.subsystem() + '_'
+            for slave in mfo.port():
+                if slave.dev_type() != 'FANOUT':
+                    continue
+                match = FANOUT_TARGET.search(slave.description())
+                if match is None:
+                    continue
+                child = by_name.get(prefix + match.group(1))
+                if child is None or child == mfo or child in self.fed_by:
+                    continue
+                self.feeds[slave] = child
+                self.fed_by[child] = slave
+                self.child_slaves[mfo].append(slave)
+        self.roots = [mfo for mfo in self.mfos if mfo not in self.fed_by]
+        # depth-first layout: order[span[m][0]:span[m][1]] is m followed by
+        # all of its descendants.
+        self.order = []
+        self.span = {}
+        self.ancestors = {}
+        starts = list(self.roots) + [m for m in self.mfos
+                                     if m in self.fed_by]
+        for start in starts:
+            if start in self.span:
+                continue
+            self.ancestors[start] = ()
+            stack = [(start, False)]
+            while stack:
+                (mfo, done) = stack.pop()
+                if done:
+                    self.span[mfo] = (self.span[mfo][0], len(self.order))
+                    continue
+                self.span[mfo] = (len(self.order), None)
+                self.order.append(mfo)
+                stack.append((mfo, True))
+                for slave in reversed(self.child_slaves[mfo]):
+                    child = self.feeds[slave]
+                    if child not in self.span:
+                        self.ancestors[child] = (mfo,) + self.ancestors[mfo]
+                        stack.append((child, False))
+    def parent_slave(self, mfo):
+        """Return the FANOUT TimingSlave feeding mfo, or None for a root."""
+        return self.fed_by.get(mfo)
+    def parent(self, mfo):
+        """Return the MFO feeding mfo, or None for a root."""
+        ancestors = self.ancestors[mfo]
+        return ancestors[0] if ancestors else None
+    def children(self, mfo):
+        """Return a list of the MFOs fed directly by mfo's FANOUT slaves."""
+        return [self.feeds[slave] for slave in self.child_slaves[mfo]]
+    def downstream_mfo(self, slave):
+        """Return the MFO fed by a FANOUT slave, or None if it isn't linked
+        to one."""
+        return self.feeds.get(slave)
+    def root(self, mfo):
+        """Return the root MFO (normally a Master) upstream of mfo."""
+        ancestors = self.ancestors[mfo]
+        return ancestors[-1] if ancestors else mfo
+    def descendants(self, device):
+        """Return a list of every MFO downstream of device, which may be an
+        MFO (which is not included in the result) or a FANOUT slave (whose
+        downstream MFO is included), in depth-first order."""
+        if isinstance(device, TimingSlave):
+            child = self.feeds.get(device)
+            if child is None:
+                return []
+            (start, end) = self.span[child]
+        else:
+            (start, end) = self.span[device]
+            start += 1
+        return self.order[start:end]
+    def downstream_channels(self, device):
+        """Yield all channels in use downstream of device: for an MFO, its own
+        channels, those of its slaves, and those of every MFO fed by it
+        (directly or not); for a Timing Slave, its own channels followed by
+        those of everything downstream of it."""
+        for ch in device.iter_channels():
+            yield ch
+        for mfo in self.descendants(device):
+            for ch in mfo.iter_channels():
+                yield ch
+    def path_to_root(self, device):
+        """Return the chain of devices connecting device (an MFO or Timing
+        Slave) to the root upstream of it, alternating between MFOs and the
+        FANOUT slaves feeding them, e.g. [comparator, its FanOut, FANOUT slave
+        on the Master, Master]."""
+        if isinstance(device, TimingSlave):
+            path = [device]
+            mfo = device.mfo()
+        else:
+            path = []
+            mfo = device
+        path.append(mfo)
+        for parent in self.ancestors[mfo]:
+            path.append(self.fed_by[mfo])
+            path.append(parent)
+            mfo = parent
+        return path
+
+_TOPOLOGY_CACHE = {}
+
+def timing_topology(site=None):
+    """Return the TimingTopology of the installed system at the given site
+    ('LHO' or 'LLO'), or at all sites if site is None, building it the first
+    time it's needed."""
+    try:
+        return _TOPOLOGY_CACHE[site]
+    except KeyError:
+        if site is None:
+            mfos = aligo_timing_system()
+        else:
+            mfos = site_timing_system(site)
+        topology = _TOPOLOGY_CACHE[site] = TimingTopology(mfos)
+        return topology
+
+class TimingSystemDiff(object):
+    """The differences between two lists of MFOs, old and new (e.g. the
+    installed system and one loaded from a file with load_timing_system()).
+    MFOs are matched by portless name, and only those whose strings differ
+    are looked into, so unchanged MFOs cost one string comparison each.
+
+    Slaves are identified by their type and description: a slave whose
+    (dev_type, description) disappears from one port and appears on another
+    has moved; any left over have been added or removed. Channel changes are
+    kept in channels, which maps each touched MFO's portless name to a dict
+    from port number (or None, for the MFO's own channels) to a pair of
+    lists, (added channels, removed channels). Only ports whose slave type
+    changed appear, since channel names don't depend on descriptions:
+
+        diff = TimingSystemDiff(load_timing_system('old.json'),
+                                lho_timing_system())
+        diff.moved_slaves      # [(old TimingSlave, new TimingSlave), ...]
+        diff.added_channels()  # every channel that's new
+    """
+    def __init__(self, old, new):
+        old_by_name = dict((mfo.portless_name(), mfo) for mfo in old)
+        new_by_name = dict((mfo.portless_name(), mfo) for mfo in new)
+        self.added_mfos = [mfo for mfo in new
+                           if mfo.portless_name() not in old_by_name]
+        self.removed_mfos = [mfo for mfo in old
+                             if mfo.portless_name() not in new_by_name]
+        self.changed_mfos = [(old_by_name[mfo.portless_name()], mfo)
+                             for mfo in new
+                             if mfo.portless_name() in old_by_name
+                             and old_by_name[mfo.portless_name()] != mfo]
+        self.channels = {}
+        for mfo in self.added_mfos:
+            self.__compare__(mfo.portless_name(), None, mfo)
+        for mfo in self.removed_mfos:
+            self.__compare__(mfo.portless_name(), mfo, None)
+        for (old_mfo, new_mfo) in self.changed_mfos:
+            self.__compare__(old_mfo.portless_name(), old_mfo, new_mfo)
+        # match up the slaves of touched MFOs by type and description.
+        old_slaves = self.__slaves__([o for (o, _) in self.changed_mfos]
+                                     + self.removed_mfos)
+        new_slaves = self.__slaves__([n for (_, n) in self.changed_mfos]
+                                     + self.added_mfos)
+        self.added_slaves = []
+        self.removed_slaves = []
+        self.moved_slaves = []
+        for key in old_slaves:
+            if key not in new_slaves:
+                self.removed_slaves += old_slaves[key].values()
+                continue
+            (olds, news) = (old_slaves[key], new_slaves[key])
+            gone = [pos for pos in olds if pos not in news]
+            came = [pos for pos in news if pos not in olds]
+            # prefer moves between ports of the same MFO.
+            for pos in list(gone):
+                same = [p for p in came if p[0] == pos[0]]
+                if same:
+                    self.moved_slaves.append((olds[pos], news[same[0]]))
+                    gone.remove(pos)
+                    came.remove(same[0])
+            self.moved_slaves += [(olds[o], news[n])
+                                  for (o, n) in zip(gone, came)]
+            self.removed_slaves += [olds[pos] for pos in gone[len(came):]]
+            self.added_slaves += [news[pos] for pos in came[len(gone):]]
+        for key in new_slaves:
+            if key not in old_slaves:
+                self.added_slaves += new_slaves[key].values()
+    @staticmethod
+    def __slaves__(mfo_list):
+        """Return a dict mapping each (dev_type, description) to a dict from
+        (portless MFO name, port number) to the slave there."""
+        res = {}
+        for mfo in mfo_list:
+            for slave in mfo.port():
+                if slave.dev_type() is not None:
+                    key = (slave.dev_type(), slave.description())
+                    pos = (mfo.portless_name(), slave.port_number())
+                    res.setdefault(key, {})[pos] = slave
+        return res
+    def __compare__(self, name, old_mfo, new_mfo):
+        """Record the channels added and removed in going from old_mfo to
+        new_mfo (either of which can be None, for an added or removed MFO)
+        under the given portless name."""
+        changes = {}
+        if old_mfo is None or new_mfo is None:
+            mfo = old_mfo or new_mfo
+            own = list(mfo.iter_own_channels())
+            changes[None] = (own, []) if old_mfo is None else ([], own)
+        for i in range(PORTS_PER_MFO):
+            old_slave = None if old_mfo is None else old_mfo.port(i)
+            new_slave = None if new_mfo is None else new_mfo.port(i)
+            old_type = None if old_slave is None else old_slave.dev_type()
+            new_type = None if new_slave is None else new_slave.dev_type()
+            if old_type == new_type:
+                continue
+            old_chs = [] if old_type is None else old_slave.get_own_channels()
+            new_chs = [] if new_type is None else new_slave.get_own_channels()
+            (old_set, new_set) = (set(old_chs), set(new_chs))
+            changes[i] = ([ch for ch in new_chs if ch not in old_set],
+                          [ch for ch in old_chs if ch not in new_set])
+        if changes:
+            self.channels[name] = changes
+    def added_channels(self):
+        """Return a list of the channels in new that aren't in old."""
+        return [ch for changes in self.channels.values()
+                for (added, _) in changes.values() for ch in added]
+    def removed_channels(self):
+        """Return a list of the channels in old that aren't in new."""
+        return [ch for changes in self.channels.values()
+                for (_, removed) in changes.values() for ch in removed]
+
+class TimingHistory(object):
+    """Configurations of the timing system over time. Each snapshot is a
+    list of MFOs (or the path of a file in the format read by
+    load_timing_system(), which is only loaded when it's first needed) that
+    took effect at a GPS start time and stayed in effect until the next
+    snapshot's start time; the last one is still in effect. Snapshots are
+    kept sorted by start time, so finding the one in effect at a given time
+    is a binary search:
+
+        history = TimingHistory([(1126051217, 'timing-system-LHO-v1.json'),
+                                 (1164556817, lho_timing_system())])
+        history.system_at(1126259462)
+        history.channels_between('H1:SYS-TIMING_X_FO_A', t0, t1)
+
+    Device lookups find the snapshots overlapping the requested times the
+    same way, and only load (and index by MFO name) those snapshots.
+    """
+    def __init__(self, snapshots=()):
+        self.starts = []
+        self.sources = []
+        self._names = []
+        for (gps_start, source) in snapshots:
+            self.add(gps_start, source)
+    def __len__(self):
+        return len(self.starts)
+    def add(self, gps_start, source):
+        """Add a snapshot (a list of MFOs or the path of a data file) taking
+        effect at gps_start, replacing any snapshot with the same start."""
+        if not isinstance(source, str):
+            source = list(source)
+        i = bisect.bisect_left(self.starts, gps_start)
+        if i < len(self.starts) and self.starts[i] == gps_start:
+            self.sources[i] = source
+            self._names[i] = None
+        else:
+            self.starts.insert(i, gps_start)
+            self.sources.insert(i, source)
+            self._names.insert(i, None)
+    def interval(self, i):
+        """Return the (start, end) GPS times of snapshot i, where end is
+        infinite for the last snapshot."""
+        if i + 1 < len(self.starts):
+            return (self.starts[i], self.starts[i + 1])
+        return (self.starts[i], float('inf'))
+    def system(self, i):
+        """Return the list of MFOs in snapshot i, loading it if needed."""
+        if isinstance(self.sources[i], str):
+            self.sources[i] = load_timing_system(self.sources[i])
+        return list(self.sources[i])
+    def index_at(self, gps_time):
+        """Return the index of the snapshot in effect at gps_time."""
+        i = bisect.bisect_right(self.starts, gps_time) - 1
+        if i < 0:
+            raise ValueError('No configuration known at GPS time: '
+                             + str(gps_time))
+        return i
+    def system_at(self, gps_time):
+        """Return the list of MFOs in effect at gps_time."""
+        return self.system(self.index_at(gps_time))
+    def indices_between(self, t0, t1):
+        """Return the range of indices of the snapshots in effect at some
+        time in [t0, t1)."""
+        first = max(bisect.bisect_right(self.starts, t0) - 1, 0)
+        last = bisect.bisect_left(self.starts, t1)
+        return range(first, last)
+    def systems_between(self, t0, t1):
+        """Return a list of (start, end, list of MFOs) for each snapshot in
+        effect at some time in [t0, t1)."""
+        return [self.interval(i) + (self.system(i),)
+                for i in self.indices_between(t0, t1)]
+    def __names__(self, i):
+        """Return a dict mapping the portless name of each MFO in snapshot i
+        to the MFO, loading the snapshot if needed."""
+        if self._names[i] is None:
+            self.system(i)
+            self._names[i] = dict((mfo.portless_name(), mfo)
+                                  for mfo in self.sources[i])
+        return self._names[i]
+    def device_between(self, device, t0, t1):
+        """Return a list of (start, end, MFO) for each version of the MFO
+        named by device (an MFO or its portless name) in effect at some time
+        in [t0, t1), merging consecutive snapshots in which it was the
+        same."""
+        if isinstance(device, MFO):
+            device = device.portless_name()
+        res = []
+        for i in self.indices_between(t0, t1):
+            mfo = self.__names__(i).get(device)
+            if mfo is None:
+                continue
+            (start, end) = self.interval(i)
+            if res and res[-1][2] == mfo and res[-1][1] == start:
+                res[-1] = (res[-1][0], end, mfo)
+            else:
+                res.append((start, end, mfo))
+        return res
+    def channels_between(self, device, t0, t1):
+        """Return a list of the channels that existed at some time in
+        [t0, t1) for device, which can be an MFO (or its portless name), in
+        which case its slaves' channels are included, or a TimingSlave, in
+        which case only the channels of whatever slave was on that port are
+        given."""
+        port = None
+        if isinstance(device, TimingSlave):
+            port = device.port_number()
+            device = device.mfo()
+        res = []
+        for (_, _, mfo) in self.device_between(device, t0, t1):
+            if port is None:
+                res.append(mfo.iter_channels())
+            elif mfo.port(port).dev_type() is not None:
+                res.append(mfo.port(port).iter_own_channels())
+        return list(unique(itertools.chain.from_iterable(res)))
+
+def load_timing_history(path):
+    """Return a TimingHistory from a JSON file holding a list of objects like
+    {"gps_start": 1126051217, "file": "timing-system-LHO-v1.json"}, where
+    each file is in the format read by load_timing_system() and relative
+    paths are relative to the history file. Snapshot files are only loaded
+    when they're needed."""
+    import json
+    with open(path) as infile:
+        entries = json.load(infile)
+    here = os.path.dirname(os.path.abspath(path))
+    return TimingHistory((entry['gps_start'],
+                          os.path.join(here, entry['file']))
+                         for entry in entries)
+
+# building blocks for synthetic timing systems: the locations to use (after
+# the corner and end stations) and some realistic descriptions for each type
+# of slave.
+SYNTHETIC_LOCATIONS = 'CXYABDEFGHIJKLMNOPQRSTUVWZ'
+SYNTHETIC_DESCRIPTIONS = {
+    'CFC': ['Comparator', 'Comparator CER', 'Comparator ISC'],
+    'DUOTONE': ['SUSAUXEY', 'SUSEX', 'SEIEY', 'ISCEX', 'PEM', 'OAF', 'MX'],
+    'IRIGB': ['IRIG-B', 'IRIG-B CNS', 'IRIG-B GPS'],
+    'XOLOCK': ['RF24.4', 'RF35.5', 'RF70.0', 'RF79.2', 'RF80.0'],
+    'FANOUT': ['CER-SUS', 'CER-ISC', 'EX', 'EY', 'Staging']
+}
+
+def _synthetic_dev_id(i):
+    """Return the i-th device ID: A, B, ..., Z, AA, AB, ..."""
+    letters = ''
+    i += 1
+    while i > 0:
+        (i, r) = divmod(i - 1, 26)
+        letters = chr(ord('A') + r) + letters
+    return letters
+
+def synthetic_timing_system(n_mfos, n_ifos=None, n_locations=3, fill=0.5,
+                            seed=0):
+    """Return a list of n_mfos MFOs making up a realistic but made-up timing
+    system, for testing and benchmarking at scales far beyond the real sites.
+    The MFOs are spread over n_ifos interferometers (named S0, S1, ...; by
+    default one per 50 MFOs) and the first n_locations of
+    SYNTHETIC_LOCATIONS. Each interferometer has a Master at C_MA_A, and every
+    other MFO is a FanOut fed by a FANOUT slave on a randomly chosen MFO of
+    the same interferometer, so FanOuts can be chained arbitrarily deep. As
+    at the real sites, the FANOUT slave's description ends with the name of
+    the FanOut it feeds, e.g. 'EX X_FO_A'. About a fraction fill of the
+    remaining ports get a random non-FANOUT slave with a description. The same
+    seed always gives the same system."""
+    import random
+    rng = random.Random(seed)
+    if n_ifos is None:
+        n_ifos = max(1, n_mfos // 50)
+    n_ifos = max(1, min(n_ifos, n_mfos))
+    locations = SYNTHETIC_LOCATIONS[:n_locations]
+    other_types = [t for t in SLAVE_TYPES if t != 'FANOUT']
+    dicts = []
+    for i in range(n_ifos):
+        ifo = 'S' + str(i)
+        count = n_mfos // n_ifos + (1 if i < n_mfos % n_ifos else 0)
+        mfos = [{'ifo': ifo, 'subsystem': 'SYS-TIMING', 'location': 'C',
+                 'm_or_f': 'MA', 'dev_id': 'A',
+                 'description': 'Synthetic Master in ' + ifo + ' C',
+                 'ports': [None] * PORTS_PER_MFO}]
+        n_fanouts = dict((loc, 0) for loc in locations)
+        # MFOs that still have a free port.
+        open_mfos = [mfos[0]]
+        for _ in range(count - 1):
+            k = rng.randrange(len(open_mfos))
+            parent = open_mfos[k]
+            location = rng.choice(locations)
+            dev_id = _synthetic_dev_id(n_fanouts[location])
+            n_fanouts[location] += 1
+            name = location + '_FO_' + dev_id
+            free = [p for (p, s) in enumerate(parent['ports']) if s is None]
+            parent['ports'][rng.choice(free)] = {
+                'dev_type': 'FANOUT',
+                'description': (rng.choice(SYNTHETIC_DESCRIPTIONS['FANOUT'])
+                                + ' ' + name)}
+            if len(free) == 1:
+                open_mfos[k] = open_mfos[-1]
+                open_mfos.pop()
+            mfos.append({'ifo': ifo, 'subsystem': 'SYS-TIMING',
+                         'location': location, 'm_or_f': 'FO',
+                         'dev_id': dev_id,
+                         'description': ('Synthetic FanOut in ' + ifo + ' '
+                                         + location),
+                         'ports': [None] * PORTS_PER_MFO})
+            open_mfos.append(mfos[-1])
+        for d in mfos:
+            for (p, slave) in enumerate(d['ports']):
+                if slave is not None:
+                    continue
+                if rng.random() < fill:
+                    dev_type = rng.choice(other_types)
+                    slave = {'dev_type': dev_type, 'description':
+                             rng.choice(SYNTHETIC_DESCRIPTIONS[dev_type])}
+                else:
+                    slave = {'dev_type': None, 'description': None}
+                d['ports'][p] = slave
+        dicts += mfos
+    return [MFO.from_dict(d) for d in dicts]
+
+class ChannelUniverse(object):
+    """An immutable set of unique channel names, e.g. every channel in use at
+    a site, with fast membership tests and prefix lookups:
+
+        universe = channel_universe('LHO')
+        'H1:SYS-TIMING_C_MA_A_PORT_2_SLAVE_CFC_TIMEDIFF_1' in universe
+        universe.with_prefix('H1:SYS-TIMING_C_MA_A_PORT_2_')
+
+    Iterating over a ChannelUniverse gives the channel names in sorted order.
+    """
+    def __init__(self, channels):
+        self.channels = frozenset(channels)
+        self.sorted_channels = tuple(sorted(self.channels))
+    def __contains__(self, name):
+        return name in self.channels
+    def __len__(self):
+        return len(self.channels)
+    def __iter__(self):
+        return iter(self.sorted_channels)
+    def is_valid_channel(self, name):
+        """Return whether name is one of the channels in this universe."""
+        return name in self.channels
+    def with_prefix(self, prefix):
+        """Return a sorted list of the channels in this universe starting with
+        prefix."""
+        start = bisect.bisect_left(self.sorted_channels, prefix)
+        end = bisect.bisect_left(self.sorted_channels, prefix + '\uffff',
+                                 start)
+        return list(self.sorted_channels[start:end])
+    def search(self, pattern, regex=False):
+        """Return a sorted list of the channels in this universe matching a
+        glob (or a regular expression, if regex is True); see ChannelPattern
+        for how patterns are matched. Only the channels starting with the
+        pattern's literal prefix are checked."""
+        if not isinstance(pattern, ChannelPattern):
+            pattern = ChannelPattern(pattern, regex)
+        if pattern.prefix:
+            candidates = self.with_prefix(pattern.prefix)
+        else:
+            candidates = self.sorted_channels
+        return [name for name in candidates if pattern.match(name)]
+
+class ChannelPattern(object):
+    """A glob or regular expression for matching channel names, compiled
+    once, along with the literal prefix that every match has to start with
+    (which may be empty). Globs, like '*_IRIGDIFF*', must match the whole
+    channel name and are case insensitive, since channel names are always
+    upper case. Regular expressions are used as given and, like grep, can
+    match anywhere in the name; only those anchored with '^' have a literal
+    prefix.
+    """
+    __slots__ = ('pattern', 'regex', 'prefix', 'compiled')
+    def __init__(self, pattern, regex=False):
+        import fnmatch
+        self.pattern = pattern
+        self.regex = regex
+        if regex:
+            self.compiled = re.compile(pattern)
+            self.prefix = self.__regex_prefix__(pattern)
+        else:
+            self.compiled = re.compile(fnmatch.translate(pattern),
+                                       re.IGNORECASE)
+            self.prefix = re.split('[*?[]', pattern)[0].upper()
+    @staticmethod
+    def __regex_prefix__(pattern):
+        """Return the literal text that an anchored regular expression has to
+        start with."""
+        if not pattern.startswith('^') or '|' in pattern:
+            return ''
+        prefix = ''
+        for c in pattern[1:]:
+            if c in '.^$*+?{}[]\\|()':
+                # a quantifier makes the character before it optional.
+                if c in '*?{':
+                    prefix = prefix[:-1]
+                break
+            prefix += c
+        return prefix
+    def match(self, name):
+        """Return whether the channel name matches this pattern."""
+        if self.regex:
+            return self.compiled.search(name) is not None
+        return self.compiled.match(name) is not None
+    def may_match_prefix(self, prefix):
+        """Return whether any name starting with prefix could match this
+        pattern, judging only by the pattern's literal prefix."""
+        return (prefix.startswith(self.prefix)
+                or self.prefix.startswith(prefix))
+
+def search_channels(pattern, regex=False, site=None, configuration='i'):
+    """Return a sorted list of the channels in channel_universe(site,
+    configuration) that match a glob or (if regex is True) a regular
+    expression, e.g. search_channels('*_IRIGDIFF*')."""
+    return channel_universe(site, configuration).search(pattern, regex)
+
+_UNIVERSE_CACHE = {}
+
+def channel_universe(site=None, configuration='i'):
+    """Return the ChannelUniverse for the given site ('LHO' or 'LLO', or all
+    sites if site is None). As with the -c option on the command line, a
+    configuration of 'i' gives the channels of the installed system, while
+    'a' gives every channel that could exist for any arrangement of slaves.
+    Each universe is only built once; clear_timing_system_cache() also
+    throws these away."""
+    key = (site, configuration)
+    try:
+        return _UNIVERSE_CACHE[key]
+    except KeyError:
+        if site is None:
+            mfos = aligo_timing_system()
+        else:
+            mfos = site_timing_system(site)
+        if configuration == 'i':
+            channels = (ch for mfo in mfos for ch in mfo.iter_channels())
+        elif configuration == 'a':
+            channels = iter_all_possible_channels(mfos)
+        else:
+            raise ValueError('Configuration must be "i" or "a", not: '
+                             + str(configuration))
+        universe = _UNIVERSE_CACHE[key] = ChannelUniverse(channels)
+        return universe
+
+# the reverse of the channel templates: for each template that can follow an
+# MFO's portless name, the CHANNEL_SUFFIXES category it comes from, the port
+# number it refers to (or None), and the bare suffix.
+CHANNEL_TEMPLATE_INDEX = {}
+for _x in CHANNEL_SUFFIXES['mfo_common']:
+    CHANNEL_TEMPLATE_INDEX['_' + _x] = ('mfo_common', None, _x)
+for _i in range(PORTS_PER_MFO):
+    for _x in CHANNEL_SUFFIXES['mfo_port_related']:
+        CHANNEL_TEMPLATE_INDEX['_PORT_' + str(_i) + '_' + _x] = (
+            'mfo_port_related', _i, _x)
+    for _category in ['slave_common'] + SLAVE_TYPES:
+        for _x in CHANNEL_SUFFIXES[_category]:
+            CHANNEL_TEMPLATE_INDEX['_PORT_' + str(_i) + '_' + _x] = (
+                _category, _i, _x)
+del _x, _i, _category
+
+class ChannelInfo(object):
+    """What a channel name refers to, as found by resolve_channel(): the
+    channel name, the MFO it belongs to, the port number it refers to (None
+    for channels about the MFO as a whole), the TimingSlave on that port (None
+    unless the channel is a slave channel), the CHANNEL_SUFFIXES category of
+    the channel ('mfo_common', 'mfo_port_related', 'slave_common', or a slave
+    type) and the bare suffix. Note that, for channels that could exist but
+    are not in use, the slave's dev_type() need not match the category.
+    """
+    __slots__ = ('name', 'mfo', 'port_number', 'slave', 'category', 'suffix')
+    def __init__(self, name, mfo, port_number, slave, category, suffix):
+        self.name = name
+        self.mfo = mfo
+        self.port_number = port_number
+        self.slave = slave
+        self.category = category
+        self.suffix = suffix
+    def __repr__(self):
+        return ('ChannelInfo(' + ', '.join(repr(x) for x in
+                (self.name, self.mfo, self.port_number, self.slave,
+                 self.category, self.suffix)) + ')')
+
+class ChannelResolver(object):
+    """Decodes channel names into ChannelInfo records for a list of MFOs,
+    using a dict from portless names to MFOs and CHANNEL_TEMPLATE_INDEX, so
+    that each lookup is linear in the length of the name. If several MFOs
+    share a portless name, the first one is used.
+    """
+    def __init__(self, mfo_list):
+        self.mfos = {}
+        for mfo in mfo_list:
+            self.mfos.setdefault(mfo.portless_name(), mfo)
+    def resolve(self, name):
+        """Return the ChannelInfo for the channel name, or None if it is not a
+        channel of any of this resolver's MFOs."""
+        split = name.find('_')
+        while split != -1:
+            mfo = self.mfos.get(name[:split])
+            if mfo is not None:
+                found = CHANNEL_TEMPLATE_INDEX.get(name[split:])
+                if found is not None:
+                    (category, port_number, suffix) = found
+                    if category.startswith('mfo_'):
+                        slave = None
+                    else:
+                        slave = mfo.port(port_number)
+                    return ChannelInfo(name, mfo, port_number, slave,
+                                       category, suffix)
+            split = name.find('_', split + 1)
+        return None
+    def resolve_all(self, names):
+        """Return a list of ChannelInfo records (or None for names that can't
+        be resolved) for the given channel names."""
+        resolve = self.resolve
+        return [resolve(name) for name in names]
+
+_RESOLVER_CACHE = {}
+
+def _installed_resolver():
+    """Return the ChannelResolver for the installed system at all sites,
+    building it the first time it is needed."""
+    try:
+        return _RESOLVER_CACHE[None]
+    except KeyError:
+        resolver = _RESOLVER_CACHE[None] = ChannelResolver(
+            aligo_timing_system())
+        return resolver
+
+def resolve_channel(name, mfo_list=None):
+    """Find the device that a channel name like
+
+        'L1:SYS-TIMING_Y_FO_A_PORT_9_SLAVE_CFC_TIMEDIFF_3'
+
+    belongs to, returning a ChannelInfo with the owning MFO, port number,
+    TimingSlave and suffix category, or None if the name is not a timing
+    channel. Names are resolved against the installed system at all sites
+    unless a list of MFOs is given."""
+    if mfo_list is None:
+        return _installed_resolver().resolve(name)
+    return ChannelResolver(mfo_list).resolve(name)
+
+def resolve_channels(names, mfo_list=None):
+    """Batch version of resolve_channel(), returning a list of ChannelInfo
+    records (or None for unresolvable names) in the same order as names."""
+    if mfo_list is None:
+        return _installed_resolver().resolve_all(names)
+    return ChannelResolver(mfo_list).resolve_all(names)
+
+def unique(items):
+    """Yield each of the given items the first time it appears, skipping any
+    repeats while keeping the original order."""
+    seen = set()
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            yield item
+
+def _unique_per_device(pairs):
+    """Given (device name, result) pairs, yield each result the first time it
+    appears in a run of pairs for the same device. The dummy MFOs made for
+    the 'a' configuration share their real MFO's name and come one after
+    another, so this drops the repeats they produce while only remembering
+    one device's results at a time."""
+    (current, seen) = (None, set())
+    for (device, result) in pairs:
+        if device != current:
+            (current, seen) = (device, set())
+        if result not in seen:
+            seen.add(result)
+            yield result
+
+# and now, a pair of classes that will allow us to handily avoid using SQL
+class DevList(list):
+    """A class for applying filters to lists of timing devices. A DevIndex
+    over the list's contents is built the first time it is needed and kept
+    until the list is modified."""
+    def select(self, dev_type=object):
+        return DevListSelector(self, dev_type)
+    def dev_index(self):
+        """Return the DevIndex for the current contents of this list."""
+        try:
+            return self._dev_index
+        except AttributeError:
+            self._dev_index = DevIndex(self)
+            return self._dev_index
+
+def _invalidating(name):
+    """Wrap the list method with the given name so that calling it on a
+    DevList throws away that DevList's cached DevIndex."""
+    method = getattr(list, name)
+    def wrapper(self, *args, **kwargs):
+        self.__dict__.pop('_dev_index', None)
+        return method(self, *args, **kwargs)
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+for _name in ('append', 'extend', 'insert', 'remove', 'pop', 'sort',
+              'reverse', '__setitem__', '__delitem__', '__iadd__', '__imul__',
+              'clear', '__setslice__', '__delslice__'):
+    if hasattr(list, _name):
+        setattr(DevList, _name, _invalidating(_name))
+del _name
+
+# the comparators that can be used in constraints, in the order in which we
+# check for them, along with compiled patterns for finding them and for
+# splitting constraints on them, and the tests they apply (to the device's
+# value and the constraint's value).
+CONSTRAINT_OPERATORS = [
+    ('!=', None, re.compile('[ \t]*!=[ \t]*'), lambda a, b: a != b),
+    ('>=', None, re.compile('[ \t]*>=[ \t]*'), lambda a, b: a >= b),
+    ('<=', None, re.compile('[ \t]*<=[ \t]*'), lambda a, b: a <= b),
+    ('=', None, re.compile('[ \t]*=[ \t]*'), lambda a, b: a == b),
+    ('>', None, re.compile('[ \t]*>[ \t]*'), lambda a, b: a > b),
+    ('<', None, re.compile('[ \t]*<[ \t]*'), lambda a, b: a < b),
+    ('IN', re.compile('[ \t]IN[ \t]'), re.compile('[ \t]+IN[ \t]+'),
+     lambda a, b: a in b),
+    ('CONTAINS', re.compile('[ \t]CONTAINS[ \t]'),
+     re.compile('[ \t]+CONTAINS[ \t]+'), lambda a, b: b in a)
+]
+
+class Constraint(object):
+    """A constraint string, like 'ifo=h1' or 'slave_types CONTAINS cfc',
+    parsed once into a reusable predicate. Holds the parameter name, the
+    comparator, the test for that comparator, a getter for the parameter, and
+    the upper-cased value (constraints are case insensitive). Calling the
+    constraint on a device returns whether the device satisfies it. Use
+    compile_constraint() to get cached instances.
+    """
+    __slots__ = ('text', 'param', 'op', 'test', 'getter', 'val', 'wildcard')
+    def __init__(self, constraint):
+        self.text = constraint
+        for (op, finder, splitter, test) in CONSTRAINT_OPERATORS:
+            if finder is None:
+                found = op in constraint
+            else:
+                found = bool(finder.search(constraint))
+            if found:
+                (param, val) = splitter.split(constraint)
+                break
+        else:
+            raise ValueError('This is a no good constraint, pal: ' +
+                             str(constraint))
+        self.param = param
+        self.op = op
+        self.test = test
+        self.getter = operator.methodcaller(param)
+        self.wildcard = val == '*'
+        self.val = val.upper()
+    def value_of(self, dev):
+        """Return the upper-cased string form of this constraint's parameter
+        for dev, which is what gets compared against the value."""
+        return str(self.getter(dev)).upper()
+    def __call__(self, dev):
+        return self.test(self.value_of(dev), self.val)
+    def __repr__(self):
+        return 'Constraint(' + repr(self.text) + ')'
+
+# rough guesses at the fraction of devices that pass a constraint using each
+# comparator, used to decide which constraints to check first.
+CONSTRAINT_SELECTIVITY = {
+    '=': 0.1,
+    'IN': 0.3,
+    'CONTAINS': 0.3,
+    '<': 0.5,
+    '>': 0.5,
+    '<=': 0.5,
+    '>=': 0.5,
+    '!=': 0.9
+}
+
+# the parameters that are plain fields of every device that has them, and so
+# can be evaluated for a whole list at once by DevIndex. anything else (like
+# TimingSlave.name(), which fails for empty ports) is only checked against
+# the devices that passed the constraints before it.
+INDEXABLE_PARAMS = frozenset(['ifo', 'subsystem', 'location', 'm_or_f',
+                              'dev_id', 'description', 'portless_name',
+                              'slave_types', 'used_ports', 'dev_type',
+                              'port_number'])
+
+@functools.lru_cache(maxsize=256)
+def compile_constraint(constraint):
+    """Return the Constraint for a constraint string, only parsing each
+    distinct string once."""
+    return Constraint(constraint)
+
+class DevIndex(object):
+    """Hash indexes over the devices in a DevList, used by DevListSelector to
+    answer equality and CONTAINS constraints by intersecting sets of list
+    positions rather than scanning every device for every constraint.
+
+    Indexes are built lazily, one per (device type, parameter) pair, the
+    first time a constraint on that parameter is applied. Each maps the
+    upper-cased string form of a device's value (which is exactly what
+    constraints are compared against) to the positions of the devices having
+    that value. For collection-valued parameters like slave_types and
+    used_ports, an inverted index maps each upper-cased element to the
+    positions of the devices containing it.
+    """
+    def __init__(self, dev_list):
+        self.dev_list = dev_list
+        self._typed = {}
+        self._values = {}
+        self._elements = {}
+    def positions(self, dev_type):
+        """Return the set of positions of devices that are instances of
+        dev_type."""
+        try:
+            return self._typed[dev_type]
+        except KeyError:
+            res = self._typed[dev_type] = frozenset(
+                i for (i, dev) in enumerate(self.dev_list)
+                if isinstance(dev, dev_type))
+            return res
+    def values(self, dev_type, param):
+        """Return the hash index of the values of param for devices of
+        dev_type, or None if param can't be evaluated for all of them."""
+        key = (dev_type, param)
+        if key not in self._values:
+            values = {}
+            elements = {}
+            try:
+                for i in sorted(self.positions(dev_type)):
+                    value = self.dev_list[i].__getattribute__(param)()
+                    values.setdefault(str(value).upper(), set()).add(i)
+                    if (isinstance(value, (set, frozenset, list, tuple))
+                            and value):
+                        for e in value:
+                            elements.setdefault(str(e).upper(), set()).add(i)
+                    else:
+                        # scalars and empty collections are indexed by their
+                        # full string form, so substring matches work the
+                        # same way.
+                        elements.setdefault(str(value).upper(), set()).add(i)
+            except Exception:
+                # leave this parameter to be checked device by device.
+                (values, elements) = (None, None)
+            self._values[key] = values
+            self._elements[key] = elements
+        return self._values[key]
+    def elements(self, dev_type, param):
+        """Return the inverted index of the (upper-cased) elements of param
+        for devices of dev_type, or None if there's no index for param."""
+        self.values(dev_type, param)
+        return self._elements[(dev_type, param)]
+    def lookup(self, dev_type, constraint):
+        """Return the set of positions of devices of dev_type matching the
+        given Constraint, or None if this kind of constraint can't be answered
+        from the index."""
+        (param, op, val) = (constraint.param, constraint.op, constraint.val)
+        if (param not in INDEXABLE_PARAMS or op not in ('=', '!=', 'CONTAINS')
+                or self.values(dev_type, param) is None):
+            return None
+        if op == '=':
+            return self.values(dev_type, param).get(val, set())
+        if op == '!=':
+            return self.positions(dev_type).difference(
+                self.values(dev_type, param).get(val, ()))
+        if op == 'CONTAINS':
+            # a value made only of word characters can't straddle the
+            # delimiters in the string form of a collection, so it's enough
+            # to look for it inside each element.
+            if re.match(r'^\w+$', val):
+                index = self.elements(dev_type, param)
+            else:
+                index = self.values(dev_type, param)
+            res = set()
+            for (key, hits) in index.items():
+                if val in key:
+                    res.update(hits)
+            return res
+        return None
+
+class DevListSelector(object):
+    """A class that specifies a specific type to which members of a DevList
+    should belong, and which provides a function for implementing that
+    restriction while narrowing search results using a list of parameters and
+    their required values. Basically just exists to allow for the nice syntax
+
+        DevList(stuff).select(MFO).by('ifo=h')
+
+    which allows for easier querying. If by() is called with no constraints,
+    with empty argument strings, or with constraints equal to the wildcard
+    symbol '*' (like below):
+
+        # all will be equal to DevList(stuff)
+        DevList(stuff).select(MFO).by('ifo=*')
+        DevList(stuff).select(MFO).by('')
+        DevList(stuff).select(MFO).by()
+        DevList(stuff).select(MFO).cancel()
+
+    then no selection occurs and the original DevList is returned (equivalent
+    to calling cancel()). If no filter on constraints is made, but only
+    a specific type of device is desired in the DevList, call only():
+
+        DevList(stuff).select(MFO).only()
+
+    will return the same DevList but with all non-MFO instances removed.
+    """
+    def __init__(self, dev_list, dev_type):
+        if not isinstance(dev_list, DevList):
+            raise ValueError('DevListSelector can only select DevList.')
+        self.dev_list = dev_list
+        self.dev_type = dev_type
+    def cancel(self):
+        """Cancel this selection and return the original DevList, with no
+        constraints applied."""
+        return self.dev_list
+    def only(self):
+        """Apply the type constraint specified by this selector without
+        applying further parameter constraints."""
+        positions = self.dev_list.dev_index().positions(self.dev_type)
+        return DevList(self.dev_list[i] for i in sorted(positions))
+    def columns(self):
+        """Return a DevColumns view of this selection for vectorized
+        filtering. Requires NumPy."""
+        return DevColumns(self.dev_list, self.dev_type)
+    def __compile__(self, constraints):
+        """Compile the given constraint strings, dropping empty and wildcard
+        constraints."""
+        compiled = []
+        for constraint in constraints:
+            if constraint == '':
+                continue
+            constraint = compile_constraint(constraint)
+            if not constraint.wildcard:
+                compiled.append(constraint)
+        return compiled
+    def iter_by(self, *constraints):
+        """A lazy version of by(), yielding matching devices one at a time
+        without building any intermediate lists. All constraints are applied
+        together: those that the DevList's DevIndex can answer (=, != and
+        CONTAINS on the INDEXABLE_PARAMS) are intersected smallest first, and
+        the rest are checked against each remaining device in a single pass,
+        stopping at the first one that fails. These are checked most
+        selective first if they're all on INDEXABLE_PARAMS; otherwise they're
+        checked in the order given, so that a constraint is never evaluated
+        for a device that an earlier one would have thrown out."""
+        compiled = self.__compile__(constraints)
+        if len(compiled) == 0:
+            for dev in self.dev_list:
+                yield dev
+            return
+        index = self.dev_list.dev_index()
+        postings = []
+        scans = []
+        for constraint in compiled:
+            hits = index.lookup(self.dev_type, constraint)
+            if hits is None:
+                scans.append(constraint)
+            elif len(hits) == 0:
+                return
+            else:
+                postings.append(hits)
+        postings.sort(key=len)
+        matches = index.positions(self.dev_type)
+        for hits in postings:
+            matches = hits.intersection(matches)
+        if all(c.param in INDEXABLE_PARAMS for c in scans):
+            scans.sort(key=lambda c: CONSTRAINT_SELECTIVITY[c.op])
+        for i in sorted(matches):
+            dev = self.dev_list[i]
+            if all(constraint(dev) for constraint in scans):
+                yield dev
+    def by(self, *constraints):
+        """Only devices in DevListSelector's DevList which match the given
+        constraints and the required type will be returned if nontrivial
+        constraints are given. If the constraint strings are empty, or if
+        the constraints are set equal to a wildcard '*', or if no constraints
+        are given, then the original DevList is returned with no changes.
+        See iter_by() for how the constraints are evaluated."""
+        if len(self.__compile__(constraints)) == 0:
+            return self.cancel()
+        return DevList(self.iter_by(*constraints))
+
+class DevColumns(object):
+    """An optional columnar view of the devices of a given type in a DevList,
+    for filtering very large device lists with vectorized NumPy operations
+    (NumPy is only needed if you use this class). Each parameter that gets
+    filtered on becomes a column of integer category codes, built the first
+    time it's needed, along with the list of distinct upper-cased values that
+    the codes refer to. A constraint only has to be tested once per distinct
+    value; the result is then spread over the devices with a single indexing
+    operation. Only the INDEXABLE_PARAMS become columns: constraints on
+    anything else are checked device by device, and only for the devices
+    that passed the constraints before them. The syntax mirrors
+    DevListSelector:
+
+        DevList(stuff).select(MFO).columns().by('ifo=h1', 'location=x')
+
+    and gives the same results as DevList(stuff).select(MFO).by(...).
+    """
+    def __init__(self, dev_list, dev_type=object):
+        import numpy
+        self.numpy = numpy
+        self.dev_list = dev_list
+        self.dev_type = dev_type
+        self.devices = [dev for dev in dev_list if isinstance(dev, dev_type)]
+        self.codes = {}
+        self.categories = {}
+    def column(self, param):
+        """Return the category codes and the list of distinct values for
+        param (one of INDEXABLE_PARAMS), building them the first time they
+        are asked for."""
+        if param not in INDEXABLE_PARAMS:
+            raise ValueError('Not a parameter that can be a column: '
+                             + str(param))
+        if param not in self.codes:
+            getter = operator.methodcaller(param)
+            lookup = {}
+            self.codes[param] = self.numpy.fromiter(
+                (lookup.setdefault(str(getter(dev)).upper(), len(lookup))
+                 for dev in self.devices),
+                dtype=self.numpy.int32, count=len(self.devices))
+            self.categories[param] = sorted(lookup, key=lookup.get)
+        return (self.codes[param], self.categories[param])
+    def mask(self, *constraints):
+        """Return a boolean array saying which of this view's devices satisfy
+        all of the given (non-wildcard) constraints, applied in order."""
+        mask = self.numpy.ones(len(self.devices), dtype=bool)
+        for constraint in constraints:
+            if constraint == '':
+                continue
+            constraint = compile_constraint(constraint)
+            if constraint.wildcard:
+                continue
+            if constraint.param not in INDEXABLE_PARAMS:
+                rows = self.numpy.flatnonzero(mask)
+                mask[rows] = self.numpy.fromiter(
+                    (constraint(self.devices[i]) for i in rows),
+                    dtype=bool, count=len(rows))
+                continue
+            (codes, categories) = self.column(constraint.param)
+            passes = self.numpy.fromiter(
+                (constraint.test(c, constraint.val) for c in categories),
+                dtype=bool, count=len(categories))
+            mask &= passes[codes]
+        return mask
+    def by(self, *constraints):
+        """Same as DevListSelector.by(), but evaluated with vectorized
+        masks."""
+        if all(constraint == '' or compile_constraint(constraint).wildcard
+               for constraint in constraints):
+            return self.dev_list
+        matches = self.numpy.flatnonzero(self.mask(*constraints))
+        return DevList(self.devices[i] for i in matches)
+
+# for deployments where even building the site models is too slow, the same
+# queries can be answered from an on-disk SQLite store generated from them.
+DATABASE_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE mfos (
+    id INTEGER PRIMARY KEY,
+    configuration TEXT,
+    position INTEGER,
+    name TEXT,
+    ifo TEXT,
+    subsystem TEXT,
+    location TEXT,
+    m_or_f TEXT,
+    dev_id TEXT,
+    description TEXT,
+    mfo TEXT
+);
+CREATE TABLE slaves (
+    id INTEGER PRIMARY KEY,
+    mfo_id INTEGER REFERENCES mfos (id),
+    port_number INTEGER,
+    dev_type TEXT,
+    description TEXT,
+    name TEXT
+);
+CREATE TABLE channels (
+    name TEXT,
+    mfo_id INTEGER REFERENCES mfos (id),
+    slave_id INTEGER REFERENCES slaves (id),
+    seq INTEGER
+);
+CREATE INDEX mfos_configuration ON mfos (configuration, position);
+CREATE INDEX mfos_ifo ON mfos (ifo);
+CREATE INDEX mfos_subsystem ON mfos (subsystem);
+CREATE INDEX mfos_location ON mfos (location);
+CREATE INDEX mfos_m_or_f ON mfos (m_or_f);
+CREATE INDEX mfos_dev_id ON mfos (dev_id);
+CREATE INDEX slaves_mfo ON slaves (mfo_id, port_number);
+CREATE INDEX slaves_port_number ON slaves (port_number);
+CREATE INDEX slaves_dev_type ON slaves (dev_type);
+CREATE INDEX channels_mfo ON channels (mfo_id, seq);
+CREATE INDEX channels_slave ON channels (slave_id, seq);
+"""
+
+def build_database(path):
+    """Write an SQLite store of the installed ('i') and all-possible ('a')
+    configurations of the timing system to path, replacing any existing
+    file. Filter fields are stored upper-cased, since queries are case
+    insensitive."""
+    import sqlite3
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(DATABASE_SCHEMA)
+        conn.executemany('INSERT INTO meta VALUES (?, ?)', [
+            ('version', str(__version__)),
+            ('last_updated', LAST_UPDATED),
+            ('data', site_data_stamp())])
+        systems = [('i', aligo_timing_system()),
+                   ('a', all_possible_channels(aligo_timing_system()))]
+        for (configuration, system) in systems:
+            for (position, mfo) in enumerate(system):
+                mfo_id = conn.execute(
+                    'INSERT INTO mfos VALUES (NULL,?,?,?,?,?,?,?,?,?,?)',
+                    (configuration, position, mfo.portless_name(),
+                     mfo.ifo().upper(), mfo.subsystem().upper(),
+                     mfo.location().upper(), mfo.m_or_f().upper(),
+                     mfo.dev_id().upper(), mfo.description(), str(mfo))
+                ).lastrowid
+                conn.executemany('INSERT INTO channels VALUES (?,?,NULL,?)',
+                                 [(ch, mfo_id, seq) for (seq, ch) in
+                                  enumerate(mfo.iter_own_channels())])
+                for slave in mfo.port():
+                    dev_type = slave.dev_type()
+                    slave_id = conn.execute(
+                        'INSERT INTO slaves VALUES (NULL,?,?,?,?,?)',
+                        (mfo_id, slave.port_number(), dev_type,
+                         slave.description(),
+                         None if dev_type is None else slave.name())
+                    ).lastrowid
+                    if dev_type is not None:
+                        conn.executemany(
+                            'INSERT INTO channels VALUES (?,?,?,?)',
+                            [(ch, mfo_id, slave_id, seq) for (seq, ch) in
+                             enumerate(slave.iter_own_channels())])
+        conn.commit()
+    finally:
+        conn.close()
+    os.rename(tmp_path, path)
+
+def open_database(path):
+    """Return an sqlite3 connection to the store at path, (re)building it
+    first if it is missing or was built from a different __version__,
+    LAST_UPDATED or site data files."""
+    import sqlite3
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+        try:
+            meta = dict(conn.execute('SELECT key, value FROM meta'))
+        except sqlite3.DatabaseError:
+            meta = {}
+        if (meta.get('version') == str(__version__) and
+                meta.get('last_updated') == LAST_UPDATED and
+                meta.get('data') == site_data_stamp()):
+            return conn
+        conn.close()
+    build_database(path)
+    return sqlite3.connect(path)
+
+def query_database(path, args):
+    """Yield the results that main() would give for the parsed command line
+    arguments args, using a single SELECT against the SQLite store at path
+    rather than building any MFO or TimingSlave objects."""
+    conn = open_database(path)
+    mfo_where = ['m.configuration = ?']
+    mfo_params = [args.configuration]
+    for (column, value) in (('ifo', args.ifo),
+                            ('subsystem', args.subsystem),
+                            ('location', args.location),
+                            ('m_or_f', args.master_or_fanout),
+                            ('dev_id', args.device_id)):
+        if value != '*':
+            mfo_where.append('m.' + column + ' = ?')
+            mfo_params.append(value.upper())
+    if args.dev_type != '*':
+        mfo_where.append('EXISTS (SELECT 1 FROM slaves AS u WHERE '
+                         'u.mfo_id = m.id AND u.dev_type = ?)')
+        mfo_params.append(args.dev_type.upper())
+    if args.port_number != '*':
+        # 'used_ports CONTAINS p' matches the port number as a substring of
+        # the list of used ports, so do the same here.
+        mfo_where.append('EXISTS (SELECT 1 FROM slaves AS u WHERE '
+                         'u.mfo_id = m.id AND u.dev_type IS NOT NULL AND '
+                         'instr(CAST(u.port_number AS TEXT), ?) > 0)')
+        mfo_params.append(args.port_number)
+    slave_where = mfo_where + ['s.dev_type IS NOT NULL']
+    slave_params = list(mfo_params)
+    if args.port_number != '*':
+        slave_where.append('s.port_number = ?')
+        slave_params.append(int(args.port_number))
+    if args.dev_type != '*':
+        slave_where.append('s.dev_type = ?')
+        slave_params.append(args.dev_type.upper())
+    mfo_channels = ('SELECT 0 AS part, m.position AS position, -1 AS port, '
+                    'c.seq AS seq, m.name AS mfo, c.name AS name '
+                    'FROM channels AS c '
+                    'JOIN mfos AS m ON c.mfo_id = m.id '
+                    'WHERE c.slave_id IS NULL AND ' + ' AND '.join(mfo_where))
+    slave_channels = ('SELECT 1 AS part, m.position AS position, '
+                      's.port_number AS port, c.seq AS seq, m.name AS mfo, '
+                      'c.name AS name '
+                      'FROM channels AS c '
+                      'JOIN slaves AS s ON c.slave_id = s.id '
+                      'JOIN mfos AS m ON s.mfo_id = m.id '
+                      'WHERE ' + ' AND '.join(slave_where))
+    # every row also gives the name of its MFO, so that the repeats from
+    # the dummy MFOs of the 'a' configuration can be dropped.
+    if args.query_type == 'm':
+        (query, params) = ('SELECT m.name, m.name FROM mfos AS m WHERE '
+                           + ' AND '.join(mfo_where)
+                           + ' ORDER BY m.position', mfo_params)
+    elif args.query_type == 's':
+        (query, params) = ('SELECT m.name, s.name FROM slaves AS s '
+                           'JOIN mfos AS m ON s.mfo_id = m.id WHERE '
+                           + ' AND '.join(slave_where)
+                           + ' ORDER BY m.position, s.port_number',
+                           slave_params)
+    elif args.query_type == 'cm':
+        (query, params) = ('SELECT mfo, name FROM (' + mfo_channels + ') '
+                           'ORDER BY position, seq', mfo_params)
+    elif args.query_type == 'cs':
+        (query, params) = ('SELECT mfo, name FROM (' + slave_channels + ') '
+                           'ORDER BY position, port, seq', slave_params)
+    else:
+        (query, params) = ('SELECT mfo, name FROM (' + mfo_channels
+                           + ' UNION ALL ' + slave_channels + ') '
+                           'ORDER BY part, position, port, seq',
+                           mfo_params + slave_params)
+    try:
+        for name in _unique_per_device(conn.execute(query, params)):
+            yield name
+    finally:
+        conn.close()
+
+# a compact binary snapshot of the expanded device and channel tables, which
+# can be memory-mapped and queried without building any MFO or TimingSlave
+# objects. All integers are in native byte order, which is recorded in the
+# magic string. The layout is:
+#
+#   header: magic, then format, string count, MFO count, channel count, and
+#           the string table indices of __version__, LAST_UPDATED and the
+#           site_data_stamp() of the data files (uint32)
+#   uint32: string table offsets (string count + 1)
+#   uint32: MFO ifo, subsystem, location, m_or_f, dev_id, and portless name
+#           columns (string table indices), then the first channel of each
+#           MFO (MFO count + 1)
+#   uint32: channel template column (string table indices)
+#   uint8:  MFO configuration column (0 for 'i', 1 for 'a')
+#   uint8:  slave types, 16 per MFO (0 for no slave, else 1 + the index into
+#           SLAVE_TYPES)
+#   int8:   channel port column (-1 for the MFO's own channels)
+#   bytes:  UTF-8 string table
+#
+# Each channel name is the portless name of its MFO followed by its template.
+# An MFO's channels are its own channels followed by those of each of its
+# slaves, in port order, just as the command line lists them.
+SNAPSHOT_MAGIC = b'GECOSNP' + (b'<' if sys.byteorder == 'little' else b'>')
+SNAPSHOT_FORMAT = 2
+SNAPSHOT_CONFIGURATIONS = ['i', 'a']
+SNAPSHOT_HEADER = '=8s7I'
+
+def build_snapshot(path):
+    """Write a binary snapshot of the installed ('i') and all-possible ('a')
+    configurations of the timing system to path, replacing any existing
+    file."""
+    import array
+    import struct
+    strings = {}
+    def code(s):
+        return strings.setdefault(s, len(strings))
+    version = code(str(__version__))
+    last_updated = code(LAST_UPDATED)
+    data = code(site_data_stamp())
+    columns = [array.array('I') for _ in range(7)]
+    templates = array.array('I')
+    configurations = array.array('B')
+    slave_types = array.array('B')
+    ports = array.array('b')
+    systems = [('i', aligo_timing_system()),
+               ('a', all_possible_channels(aligo_timing_system()))]
+    for (configuration, system) in systems:
+        for mfo in system:
+            for (column, s) in zip(columns, (mfo.ifo(), mfo.subsystem(),
+                                             mfo.location(), mfo.m_or_f(),
+                                             mfo.dev_id(),
+                                             mfo.portless_name())):
+                column.append(code(s))
+            columns[6].append(len(templates))
+            configurations.append(SNAPSHOT_CONFIGURATIONS.index(configuration))
+            for template in MFO_CHANNEL_TEMPLATES:
+                templates.append(code(template))
+                ports.append(-1)
+            for slave in mfo.port():
+                dev_type = slave.dev_type()
+                if dev_type is None:
+                    slave_types.append(0)
+                    continue
+                slave_types.append(1 + SLAVE_TYPES.index(dev_type))
+                key = (slave.port_number(), dev_type)
+                for template in SLAVE_CHANNEL_TEMPLATES[key]:
+                    templates.append(code(template))
+                    ports.append(slave.port_number())
+    columns[6].append(len(templates))
+    encoded = [s.encode('utf-8') for s in sorted(strings, key=strings.get)]
+    offsets = array.array('I', [0])
+    for s in encoded:
+        offsets.append(offsets[-1] + len(s))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as outfile:
+        outfile.write(struct.pack(SNAPSHOT_HEADER,
+            SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, len(encoded),
+            len(configurations), len(templates), version, last_updated,
+            data))
+        for column in [offsets] + columns + [templates, configurations,
+                                             slave_types, ports]:
+            outfile.write(column.tobytes())
+        outfile.write(b''.join(encoded))
+    os.rename(tmp_path, path)
+
+class ChannelSnapshot(object):
+    """A read-only, memory-mapped view of a snapshot written by
+    build_snapshot(). Columns are exposed as memoryviews onto the file, and
+    strings are only decoded when they are needed, so opening a snapshot
+    costs next to nothing. Use load_snapshot() to (re)build the file
+    automatically when it is out of date.
+    """
+    def __init__(self, path):
+        import mmap
+        import struct
+        with open(path, 'rb') as infile:
+            self.mmap = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, fmt, n_strings, n_mfos, n_channels, version, last_updated,
+         data) = struct.unpack_from(SNAPSHOT_HEADER, self.mmap, 0)
+        if magic != SNAPSHOT_MAGIC or fmt != SNAPSHOT_FORMAT:
+            self.mmap.close()
+            raise ValueError('Not a snapshot in a format we can read: ' + path)
+        # the header gives the size of every column, and the last string
+        # offset the size of the strings after them, so a truncated or
+        # padded file can be caught before anything is read from it.
+        header_size = struct.calcsize(SNAPSHOT_HEADER)
+        strings_start = (header_size + 4 * (n_strings + 1)
+                         + 4 * (7 * n_mfos + 1) + 5 * n_channels
+                         + (1 + PORTS_PER_MFO) * n_mfos)
+        size = len(self.mmap)
+        if (strings_start > size or strings_start + struct.unpack_from(
+                'I', self.mmap, header_size + 4 * n_strings)[0] != size):
+            self.mmap.close()
+            raise ValueError('Snapshot is the wrong size: ' + path)
+        view = memoryview(self.mmap)
+        pos = [header_size]
+        def column(n, typecode, size):
+            res = view[pos[0]:pos[0] + n * size].cast(typecode)
+            pos[0] += n * size
+            return res
+        self.offsets = column(n_strings + 1, 'I', 4)
+        (self.ifo, self.subsystem, self.location, self.m_or_f,
+         self.dev_id, self.name) = [column(n_mfos, 'I', 4) for _ in range(6)]
+        self.first_channel = column(n_mfos + 1, 'I', 4)
+        self.templates = column(n_channels, 'I', 4)
+        self.configurations = column(n_mfos, 'B', 1)
+        self.slave_types = column(n_mfos * PORTS_PER_MFO, 'B', 1)
+        self.ports = column(n_channels, 'b', 1)
+        self.strings_start = strings_start
+        self._strings = {}
+        self.version = self.string(version)
+        self.last_updated = self.string(last_updated)
+        self.data = self.string(data)
+    def close(self):
+        """Release the memory map of the snapshot file."""
+        for name in ('offsets', 'ifo', 'subsystem', 'location', 'm_or_f',
+                     'dev_id', 'name', 'first_channel', 'templates',
+                     'configurations', 'slave_types', 'ports'):
+            getattr(self, name).release()
+        self.mmap.close()
+    def string(self, i):
+        """Return the string with index i in the string table."""
+        try:
+            return self._strings[i]
+        except KeyError:
+            start = self.strings_start + self.offsets[i]
+            end = self.strings_start + self.offsets[i + 1]
+            s = self._strings[i] = self.mmap[start:end].decode('utf-8')
+            return s
+    def is_current(self):
+        """Return whether this snapshot was built from the current version of
+        this module and its site data files."""
+        return (self.version == str(__version__) and
+                self.last_updated == LAST_UPDATED and
+                self.data == site_data_stamp())
+    def mfo_rows(self, args):
+        """Return the indices of the MFOs matching the filters in the parsed
+        command line arguments args, in order."""
+        rows = [j for (j, c) in enumerate(self.configurations)
+                if SNAPSHOT_CONFIGURATIONS[c] == args.configuration]
+        for (column, value) in ((self.ifo, args.ifo),
+                                (self.subsystem, args.subsystem),
+                                (self.location, args.location),
+                                (self.m_or_f, args.master_or_fanout),
+                                (self.dev_id, args.device_id)):
+            if value != '*':
+                rows = [j for j in rows
+                        if self.string(column[j]).upper() == value.upper()]
+        if args.dev_type != '*':
+            code = 1 + SLAVE_TYPES.index(args.dev_type.upper())
+            rows = [j for j in rows if code in self.__types__(j)]
+        if args.port_number != '*':
+            # 'used_ports CONTAINS p' matches the port number as a substring
+            # of the list of used ports, so do the same here.
+            rows = [j for j in rows if any(
+                args.port_number in str(p)
+                for (p, t) in enumerate(self.__types__(j)) if t != 0)]
+        return rows
+    def __types__(self, j):
+        """Return the slave type codes for the ports of MFO j."""
+        return self.slave_types[j * PORTS_PER_MFO:(j + 1) * PORTS_PER_MFO]
+    def __slave_ok__(self, args, j, p):
+        """Return whether the slave on port p of MFO j passes the slave
+        filters in args."""
+        code = self.slave_types[j * PORTS_PER_MFO + p]
+        return (code != 0
+                and (args.port_number == '*' or int(args.port_number) == p)
+                and (args.dev_type == '*'
+                     or SLAVE_TYPES[code - 1] == args.dev_type.upper()))
+    def query(self, args):
+        """Yield the results that main() would give for the parsed command
+        line arguments args."""
+        return _unique_per_device(self.__query_pairs__(args))
+    def __query_pairs__(self, args):
+        """Yield (MFO name, result) for each result of query(), including
+        the repeats from the dummy MFOs of the 'a' configuration."""
+        rows = self.mfo_rows(args)
+        if args.query_type == 'm':
+            for j in rows:
+                prefix = self.string(self.name[j])
+                yield (prefix, prefix)
+        if args.query_type == 's':
+            for j in rows:
+                prefix = self.string(self.name[j])
+                for p in range(PORTS_PER_MFO):
+                    if self.__slave_ok__(args, j, p):
+                        code = self.slave_types[j * PORTS_PER_MFO + p]
+                        yield (prefix, prefix + '_PORT_' + str(p)
+                               + '_SLAVE_' + SLAVE_TYPES[code - 1])
+        if args.query_type == 'c' or args.query_type == 'cm':
+            for j in rows:
+                prefix = self.string(self.name[j])
+                for k in range(self.first_channel[j],
+                               self.first_channel[j + 1]):
+                    if self.ports[k] == -1:
+                        yield (prefix,
+                               prefix + self.string(self.templates[k]))
+        if args.query_type == 'c' or args.query_type == 'cs':
+            for j in rows:
+                prefix = self.string(self.name[j])
+                for k in range(self.first_channel[j],
+                               self.first_channel[j + 1]):
+                    p = self.ports[k]
+                    if p != -1 and self.__slave_ok__(args, j, p):
+                        yield (prefix,
+                               prefix + self.string(self.templates[k]))
+
+def load_snapshot(path):
+    """Return a ChannelSnapshot for the file at path, (re)building it first if
+    it is missing, unreadable, or was built from a different __version__,
+    LAST_UPDATED or site data files."""
+    import struct
+    if os.path.exists(path):
+        try:
+            snapshot = ChannelSnapshot(path)
+        except (ValueError, struct.error):
+            snapshot = None
+        if snapshot is not None:
+            if snapshot.is_current():
+                return snapshot
+            snapshot.close()
+    build_snapshot(path)
+    return ChannelSnapshot(path)
+
+# command line queries are answered from a DevList of the relevant MFOs,
+# which is kept (along with its DevIndex) for as long as the site models are.
+_QUERY_CACHE = {}
+
+def query_system(ifo='*', configuration='i'):
+    """Return the DevList of MFOs searched by command line queries with the
+    given --ifo and --configuration. Only the site for the requested
+    interferometer is loaded, and each DevList is only built once;
+    clear_timing_system_cache() also throws these away."""
+    key = (ifo, configuration)
+    try:
+        return _QUERY_CACHE[key]
+    except KeyError:
+        if ifo == '*':
+            system = aligo_timing_system()
+        else:
+            system = list(site_timing_system(IFO_SITES[ifo.upper()]))
+        if configuration == 'a':
+            system = all_possible_channels(system)
+        devs = _QUERY_CACHE[key] = DevList(system)
+        return devs
+
+def query_results(args):
+    """Yield the results that main() would give for the parsed command line
+    arguments args, once each, from the in-memory models (or from the store
+    named by args.cache or args.database, if given)."""
+    pattern = ChannelPattern(args.glob)
+    def constrain_mfo(args):
+        return query_system(args.ifo, args.configuration).select(MFO).by(
+            'ifo='+args.ifo,
+            'subsystem='+args.subsystem,
+            'location='+args.location,
+            'm_or_f='+args.master_or_fanout,
+            'dev_id='+args.device_id,
+            'slave_types CONTAINS '+args.dev_type,
+            'used_ports CONTAINS '+args.port_number)
+    def constrain_slave(args):
+        slaves = DevList()
+        for mfo in constrain_mfo(args):
+            slaves += mfo.port()
+        return slaves.select(TimingSlave).by(
+            'dev_type!=None',
+            'port_number='+args.port_number,
+            'dev_type='+args.dev_type)
+    def could_match(prefix):
+        return args.glob == '*' or pattern.may_match_prefix(prefix)
+    def results(args):
+        # deal with each specific query_type, giving the name of the MFO
+        # that each result came from as well.
+        if args.query_type == 'm':
+            for mfo in constrain_mfo(args):
+                yield (mfo.portless_name(), mfo.portless_name())
+        if args.query_type == 's':
+            for slave in constrain_slave(args):
+                yield (slave.mfo().portless_name(), slave.name())
+        if args.query_type == 'c' or args.query_type == 'cm':
+            for mfo in constrain_mfo(args):
+                prefix = mfo.portless_name()
+                if could_match(prefix):
+                    for ch in mfo.iter_own_channels():
+                        yield (prefix, ch)
+        if args.query_type == 'c' or args.query_type == 'cs':
+            for slave in constrain_slave(args):
+                prefix = slave.mfo().portless_name()
+                if could_match(prefix):
+                    for ch in slave.iter_own_channels():
+                        yield (prefix, ch)
+    if args.cache is not None:
+        found = load_snapshot(args.cache).query(args)
+    elif args.database is not None:
+        found = query_database(args.database, args)
+    else:
+        found = _unique_per_device(results(args))
+    # skip the pattern check entirely for the default wildcard.
+    if args.glob == '*':
+        return found
+    return (res for res in found if pattern.match(res))
+
+# a long-running server keeps the site models and query indexes in memory and
+# answers queries over HTTP, on a TCP port or a Unix socket. clients POST a
+# JSON object like {"args": ["-q", "s", "-t", "cfc"], "format": "lines"},
+# where "args" are command line arguments for the query and "format" is
+# either "lines" (results separated by newlines, or NULs with -0) or "json"
+# (a JSON object with a "results" list).
+SERVER_ENVIRONMENT_VARIABLE = 'GECO_CHANNELS_SERVER'
+# the query options, and the flags that set them, that are sent to a server.
+QUERY_OPTIONS = [
+    ('configuration', '-c'),
+    ('ifo', '-i'),
+    ('subsystem', '-s'),
+    ('location', '-l'),
+    ('master_or_fanout', '-m'),
+    ('device_id', '-d'),
+    ('port_number', '-p'),
+    ('dev_type', '-t'),
+    ('query_type', '-q'),
+    ('glob', '-g')
+]
+# options that only make sense for a local process, which servers refuse.
+LOCAL_OPTIONS = ['database', 'cache', 'build_cache', 'output', 'serve',
+                 'connect']
+
+def query_argv(args):
+    """Return a list of command line arguments giving the same query as the
+    parsed command line arguments args, for sending to a server."""
+    argv = []
+    for (dest, flag) in QUERY_OPTIONS:
+        argv += [flag, getattr(args, dest)]
+    return argv
+
+def _split_address(address):
+    """Return (host, port) for a HOST:PORT address, or None for the path of a
+    Unix socket."""
+    (host, sep, port) = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address:
+        return (host or 'localhost', int(port))
+    return None
+
+def query_server(address, argv, format='lines', timeout=10.0):
+    """Send a query, given as a list of command line arguments, to a server
+    started with --serve at address (HOST:PORT or the path of a Unix
+    socket). For the "lines" format, return an iterator over the results as
+    they arrive; for "json", return the list of results. Raises an OSError
+    if the server can't be reached, doesn't answer within timeout seconds or
+    stops before the end of its answer (which the iterator only finds out
+    once it gets there), or a ValueError if it rejects the query."""
+    import http.client
+    import json
+    import socket
+    class UnixHTTPConnection(http.client.HTTPConnection):
+        def connect(self):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(self.timeout)
+            self.sock.connect(address)
+    host_port = _split_address(address)
+    if host_port is None:
+        conn = UnixHTTPConnection('localhost', timeout=timeout)
+    else:
+        conn = http.client.HTTPConnection(*host_port, timeout=timeout)
+    body = json.dumps({'args': list(argv), 'format': format})
+    try:
+        conn.request('POST', '/', body.encode('utf-8'),
+                     {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+    except http.client.HTTPException as err:
+        conn.close()
+        raise OSError('Bad response from server: ' + repr(err))
+    if response.status != 200:
+        try:
+            message = json.loads(response.read().decode('utf-8'))['error']
+        except (ValueError, KeyError, TypeError):
+            message = response.reason
+        conn.close()
+        raise ValueError('Server rejected query: ' + message)
+    if format == 'json':
+        try:
+            results = json.loads(response.read().decode('utf-8'))['results']
+        except http.client.HTTPException as err:
+            raise OSError('Incomplete response from server: ' + repr(err))
+        finally:
+            conn.close()
+        return results
+    # results are streamed in chunks, ending with an empty chunk, so that we
+    # can tell a complete answer from one that was cut short.
+    if not response.chunked:
+        conn.close()
+        raise OSError('Server did not send a chunked response.')
+    delimiter = '\0' if '-0' in argv or '--null' in argv else '\n'
+    def lines():
+        buf = ''
+        try:
+            while True:
+                try:
+                    chunk = response.read(65536)
+                except http.client.HTTPException as err:
+                    raise OSError('Incomplete response from server: '
+                                  + repr(err))
+                if not chunk:
+                    break
+                buf += chunk.decode('utf-8')
+                parts = buf.split(delimiter)
+                buf = parts.pop()
+                for line in parts:
+                    yield line
+        finally:
+            conn.close()
+    return lines()
+
+def make_query_server(address, timeout=30.0):
+    """Return an HTTP server listening at address (HOST:PORT or the path of a
+    Unix socket) that answers queries from query_server() clients, each in
+    its own thread. Clients that stop sending or reading for timeout seconds
+    are dropped. Call its serve_forever() method to start answering."""
+    import http.server
+    import json
+    import socketserver
+    import stat
+    parser = argument_parser()
+    # argparse exits (after printing to the server's stdout) on errors and
+    # for --help; turn those into errors for the client instead.
+    def error(message):
+        raise ValueError(message)
+    def exit(status=0, message=None):
+        raise ValueError(message or 'Option not allowed by server: --help')
+    parser.error = error
+    parser.exit = exit
+    parser.print_help = lambda file=None: None
+    class ChunkedWriter(object):
+        """A minimal text file that writes to an HTTP/1.1 response body, one
+        chunk per write. close() writes the empty chunk that ends the
+        body."""
+        def __init__(self, wfile):
+            self.wfile = wfile
+        def write(self, text):
+            data = text.encode('utf-8')
+            # an empty chunk would end the body early.
+            if data:
+                self.wfile.write(b'%x\r\n' % len(data) + data + b'\r\n')
+        def flush(self):
+            self.wfile.flush()
+        def close(self):
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+    class QueryHandler(http.server.BaseHTTPRequestHandler):
+        # needed for chunked replies. every reply closes the connection.
+        protocol_version = 'HTTP/1.1'
+        def reply(self, code, content_type, body=None):
+            self.send_response(code)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Connection', 'close')
+            if body is None:
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                return
+            body = body.encode('utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def do_POST(self):
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length).decode('utf-8'))
+                args = parser.parse_args(request.get('args', []))
+                fmt = request.get('format', 'lines')
+                for dest in LOCAL_OPTIONS:
+                    if getattr(args, dest) is not None:
+                        raise ValueError('Option not allowed by server: '
+                                         + dest)
+                if fmt not in ('lines', 'json'):
+                    raise ValueError('Unknown format: ' + str(fmt))
+            except (ValueError, TypeError, AttributeError, SystemExit) as err:
+                self.reply(400, 'application/json',
+                           json.dumps({'error': str(err)}))
+                return
+            if fmt == 'json':
+                self.reply(200, 'application/json',
+                           json.dumps({'results': list(query_results(args))}))
+                return
+            self.reply(200, 'text/plain; charset=utf-8')
+            out = ChunkedWriter(self.wfile)
+            write_lines(query_results(args), out,
+                        '\0' if args.null else '\n')
+            out.close()
+        def handle(self):
+            try:
+                http.server.BaseHTTPRequestHandler.handle(self)
+            except OSError as err:
+                # the client went away, or stalled for longer than timeout.
+                # any answer it was sent is left unfinished, so it will know.
+                self.log_error('Dropped client: %r', err)
+        def log_request(self, code='-', size='-'):
+            # don't log every successful query, only errors.
+            pass
+        def address_string(self):
+            # Unix socket clients don't have an address.
+            if self.client_address:
+                return self.client_address[0]
+            return address
+    # StreamRequestHandler puts this timeout on each client's socket.
+    QueryHandler.timeout = timeout
+    class UnixHTTPServer(socketserver.ThreadingMixIn,
+                         socketserver.UnixStreamServer):
+        daemon_threads = True
+        def server_bind(self):
+            # replace a socket left over from an earlier server.
+            try:
+                if stat.S_ISSOCK(os.stat(address).st_mode):
+                    os.remove(address)
+            except OSError:
+                pass
+            socketserver.UnixStreamServer.server_bind(self)
+        def server_close(self):
+            socketserver.UnixStreamServer.server_close(self)
+            try:
+                os.remove(address)
+            except OSError:
+                pass
+    host_port = _split_address(address)
+    if host_port is None:
+        return UnixHTTPServer(address, QueryHandler)
+    return http.server.ThreadingHTTPServer(host_port, QueryHandler)
+
+def serve(address):
+    """Warm up the query indexes for every --ifo and --configuration, then
+    answer queries from clients at address (HOST:PORT or the path of a Unix
+    socket) until interrupted."""
+    for ifo in ('*', 'h1', 'l1'):
+        for configuration in ('i', 'a'):
+            for _ in query_results(parse_args(['-c', configuration,
+                                               '-i', ifo])):
+                pass
+    import signal
+    server = make_query_server(address)
+    # stop cleanly (removing any Unix socket) when asked to by a supervisor.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+# live values for channels are read through a ChannelBackend, which wraps a
+# client for some data source (like EPICS Channel Access or NDS).
+# fetch_values() spreads the reads over a bounded number of concurrent
+# requests, each asking for up to the backend's batch_size channels.
+class ChannelBackend(object):
+    """The interface for sources of live channel values. Subclasses override
+    the read() coroutine, which takes a list of at most batch_size channel
+    names and returns a dict mapping those names to their current values;
+    channels that can't be read should be left out. A CA-like backend, where
+    every channel is its own request, has a batch_size of 1, while an
+    NDS-like backend can ask for many channels at once. The open() and
+    close() coroutines are awaited before the first read and after the last
+    one of each fetch."""
+    batch_size = 1
+    async def open(self):
+        pass
+    async def close(self):
+        pass
+    async def read(self, channels):
+        raise NotImplementedError()
+
+class EpicsBackend(ChannelBackend):
+    """Read channels over EPICS Channel Access using pyepics (which must be
+    installed), batch_size channels per caget_many() call. pyepics blocks,
+    so each call runs in the event loop's default executor."""
+    def __init__(self, batch_size=100, timeout=None):
+        import epics
+        self.epics = epics
+        self.batch_size = batch_size
+        self.timeout = timeout
+    async def read(self, channels):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        values = await loop.run_in_executor(None, functools.partial(
+            self.epics.caget_many, list(channels), timeout=self.timeout))
+        return dict((ch, val) for (ch, val) in zip(channels, values)
+                    if val is not None)
+
+class FakeBackend(ChannelBackend):
+    """An in-process backend for tests. Values come from the dict (or
+    function of channel name) values; channels missing from the dict are
+    left unread. Each read takes delay seconds, reads including a channel in
+    hang never finish (for exercising timeouts), and reads including a
+    channel in fail raise a ConnectionError. Counts of reads made and the
+    most reads ever in flight at once are kept in reads and max_in_flight."""
+    def __init__(self, values, batch_size=1, delay=0.0, hang=(), fail=()):
+        self.values = values
+        self.batch_size = batch_size
+        self.delay = delay
+        self.hang = frozenset(hang)
+        self.fail = frozenset(fail)
+        self.reads = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+    async def read(self, channels):
+        import asyncio
+        self.reads += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.hang.intersection(channels):
+                await asyncio.Event().wait()
+            await asyncio.sleep(self.delay)
+            if self.fail.intersection(channels):
+                raise ConnectionError('Failed to read: ' + str(channels))
+            if callable(self.values):
+                return dict((ch, self.values(ch)) for ch in channels)
+            return dict((ch, self.values[ch]) for ch in channels
+                        if ch in self.values)
+        finally:
+            self.in_flight -= 1
+
+def _channel_names(items):
+    """Yield channel names from items, which can mix channel names with
+    devices (like the results of DevListSelector.by()), whose channels are
+    used."""
+    for item in items:
+        if isinstance(item, MEDMScreen):
+            for ch in item.iter_channels():
+                yield ch
+        else:
+            yield item
+
+async def fetch_values_async(channels, backend, concurrency=8, timeout=5.0):
+    """Read the current values of channels (channel names, like the output of
+    get_channels(), or devices, like the output of DevListSelector.by())
+    from backend, with at most concurrency reads in flight at once and
+    giving up on any read that takes longer than timeout seconds or that
+    fails. Returns a dict mapping each channel to its value, or to None if it
+    couldn't be read."""
+    import asyncio
+    names = list(unique(_channel_names(channels)))
+    values = dict.fromkeys(names)
+    size = max(1, backend.batch_size)
+    batches = (names[i:i + size] for i in range(0, len(names), size))
+    async def worker():
+        # the workers share one iterator, so each batch is read only once.
+        for batch in batches:
+            try:
+                found = await asyncio.wait_for(backend.read(batch), timeout)
+            except Exception:
+                # a timeout or a failed read only loses this batch.
+                continue
+            for ch in batch:
+                values[ch] = found.get(ch)
+    await backend.open()
+    workers = [asyncio.ensure_future(worker())
+               for _ in range(max(1, concurrency))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        # make sure no reads are still going when the backend is closed.
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await backend.close()
+    return values
+
+def fetch_values(channels, backend, concurrency=8, timeout=5.0):
+    """Run fetch_values_async() to completion in a new event loop and return
+    its result. Use fetch_values_async() directly from async code."""
+    import asyncio
+    return asyncio.run(fetch_values_async(channels, backend, concurrency,
+                                          timeout))
+
+# the port and slave status channels that say whether each link is healthy.
+HEALTH_PORT_FLAGS = ('ACTIVE', 'DELAYERR', 'ERROR_FLAG', 'LOS', 'MISSING',
+                     'UP')
+HEALTH_SLAVE_FLAGS = ('SLAVE_ERROR_FLAG', 'SLAVE_UPLINKLOS')
+HEALTH_FLAGS = HEALTH_PORT_FLAGS + HEALTH_SLAVE_FLAGS
+# flags that signal a problem when set on a port that should be in use, and
+# those that signal a problem when cleared.
+HEALTH_BAD_WHEN_SET = ('DELAYERR', 'ERROR_FLAG', 'LOS', 'MISSING',
+                       'SLAVE_ERROR_FLAG', 'SLAVE_UPLINKLOS')
+HEALTH_BAD_WHEN_CLEAR = ('ACTIVE', 'UP')
+
+def _flag(value):
+    """Return whether a channel value counts as set, or None if it wasn't
+    read. Strings like 'On' or '1' are set, while '', '0' and 'Off' are
+    not."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value.strip().upper() not in ('', '0', 'OFF', 'FALSE', 'NO')
+    return bool(value)
+
+class HealthSnapshot(object):
+    """The status flags of every port of a list of MFOs, laid out as a table
+    with one row per port: row i is port i % PORTS_PER_MFO of MFO
+    i // PORTS_PER_MFO. columns maps each of HEALTH_FLAGS to a list with a
+    flag for each row (True, False, or None if it wasn't read; slave flags
+    are only read for ports with a slave installed), and used lists whether
+    each port should be in use according to used_ports(). Build one from a
+    dict of channel values with HealthSnapshot(mfos, values), or read one
+    through a ChannelBackend with health_snapshot()."""
+    def __init__(self, mfos, values):
+        self.mfos = list(mfos)
+        self.names = []
+        self.used = []
+        self.slaves = []
+        for mfo in self.mfos:
+            used = set(mfo.used_ports())
+            for (i, slave) in enumerate(mfo.port()):
+                self.names.append(mfo.portless_name() + '_PORT_' + str(i))
+                self.used.append(i in used)
+                self.slaves.append(slave)
+        self.columns = {}
+        for suffix in HEALTH_FLAGS:
+            self.columns[suffix] = [_flag(values.get(name + '_' + suffix))
+                                    for name in self.names]
+    def problems(self):
+        """Return a list with a tuple for each row, naming the flags that are
+        out of line with whether that port should be in use: for a used
+        port, any of HEALTH_BAD_WHEN_SET that are set and any of
+        HEALTH_BAD_WHEN_CLEAR that are clear (as when a port expected in use
+        reports LOS); for an unused port, ACTIVE or UP being set (suggesting
+        a device that isn't in the model). Flags that weren't read are
+        ignored."""
+        set_cols = [self.columns[s] for s in HEALTH_BAD_WHEN_SET]
+        clear_cols = [self.columns[s] for s in HEALTH_BAD_WHEN_CLEAR]
+        res = []
+        for (row, used) in enumerate(self.used):
+            if used:
+                found = tuple(
+                    [s for (s, col) in zip(HEALTH_BAD_WHEN_SET, set_cols)
+                     if col[row]] +
+                    [s for (s, col) in zip(HEALTH_BAD_WHEN_CLEAR, clear_cols)
+                     if col[row] is False])
+            else:
+                found = tuple(s for (s, col) in zip(HEALTH_BAD_WHEN_CLEAR,
+                                                    clear_cols) if col[row])
+            res.append(found)
+        return res
+    def mismatches(self):
+        """Return a list of (port name, slave, problem flags) for each port
+        whose flags are out of line with the model, where port names are
+        like 'H1:SYS-TIMING_C_MA_A_PORT_2' and slave is the TimingSlave on
+        that port."""
+        return [(self.names[row], self.slaves[row], found)
+                for (row, found) in enumerate(self.problems()) if found]
+    def table(self):
+        """Return a list with a dict for each row, holding the port name,
+        whether it's used, its slave's type (None for unused ports), and
+        its flags."""
+        res = []
+        for (row, name) in enumerate(self.names):
+            entry = {'port': name, 'used': self.used[row],
+                     'dev_type': self.slaves[row].dev_type()}
+            for suffix in HEALTH_FLAGS:
+                entry[suffix] = self.columns[suffix][row]
+            res.append(entry)
+        return res
+
+def health_channels(mfo_list):
+    """Return a list of the status channels read for a HealthSnapshot of
+    mfo_list: the port flags for every port, and the slave flags for ports
+    with a slave installed."""
+    res = []
+    for mfo in mfo_list:
+        used = set(mfo.used_ports())
+        for i in range(PORTS_PER_MFO):
+            prefix = mfo.portless_name() + '_PORT_' + str(i) + '_'
+            res += [prefix + x for x in HEALTH_PORT_FLAGS]
+            if i in used:
+                res += [prefix + x for x in HEALTH_SLAVE_FLAGS]
+    return res
+
+async def health_snapshot_async(backend, mfo_list=None, concurrency=8,
+                                timeout=5.0):
+    """Read the status channels of every port of mfo_list (by default the
+    installed system at all sites) through backend, as with
+    fetch_values_async(), and return a HealthSnapshot of the results."""
+    if mfo_list is None:
+        mfo_list = aligo_timing_system()
+    values = await fetch_values_async(health_channels(mfo_list), backend,
+                                      concurrency, timeout)
+    return HealthSnapshot(mfo_list, values)
+
+def health_snapshot(backend, mfo_list=None, concurrency=8, timeout=5.0):
+    """Run health_snapshot_async() to completion in a new event loop and
+    return its result."""
+    import asyncio
+    return asyncio.run(health_snapshot_async(backend, mfo_list, concurrency,
+                                             timeout))
+
+def __run_tests__():
+    """Run tests to confirm that the script is behaving as expected."""
+    # the cached site models should match freshly loaded ones.
+    for site in SITE_DATA_FILES:
+        if list(site_timing_system(site)) != _load_site(site):
+            raise AssertionError('Cached model differs from a fresh build '
+                                 'for site: ' + site)
+    # indexed queries should agree with a plain scan of every device.
+    devs = DevList(aligo_timing_system())
+    for constraint in ('ifo=h1', 'location!=c', 'used_ports CONTAINS 1',
+                       'slave_types CONTAINS cfc', 'dev_id<b'):
+        compiled = compile_constraint(constraint)
+        scan = [d for d in devs if compiled(d)]
+        if list(devs.select(MFO).by(constraint)) != scan:
+            raise AssertionError('Indexed query disagrees with scan: '
+                                 + constraint)
+    # constraints that can't be evaluated for every device (like name() on
+    # an empty port) should only be checked against the devices that passed
+    # the constraints before them.
+    slaves = DevList(s for mfo in aligo_timing_system() for s in mfo.port())
+    named = slaves.select(TimingSlave).by('dev_type!=None',
+                                          'name CONTAINS CFC')
+    if list(named) != [s for s in slaves if s.dev_type() == 'CFC']:
+        raise AssertionError('Constraint on name() gave the wrong slaves.')
+    # the direct "all possible" channel generator should give exactly the
+    # channels of the dummy MFOs, once each.
+    universe = list(iter_all_possible_channels(aligo_timing_system()))
+    dummies = set(ch for mfo in all_possible_channels(aligo_timing_system())
+                  for ch in mfo.iter_channels())
+    if len(universe) != len(set(universe)) or set(universe) != dummies:
+        raise AssertionError('iter_all_possible_channels disagrees with '
+                             'all_possible_channels.')
+    # synthetic systems should be well formed and usable as a DevList.
+    synthetic = DevList(synthetic_timing_system(200, n_ifos=3, seed=1))
+    if len(synthetic) != 200 or len(set(synthetic)) != 200:
+        raise AssertionError('Synthetic system has the wrong MFOs.')
+    if len(synthetic.select(MFO).by('m_or_f=ma')) != 3:
+        raise AssertionError('Synthetic system should have one Master per '
+                             'interferometer.')
+    fanouts = sum(1 for mfo in synthetic for slave in mfo.port()
+                  if slave.dev_type() == 'FANOUT')
+    if fanouts != 200 - 3:
+        raise AssertionError('Every synthetic FanOut should be fed by exactly '
+                             'one FANOUT slave.')
+    # each synthetic FanOut should hang off its interferometer's Master, and
+    # each installed FanOut off its site's Master.
+    topology = TimingTopology(synthetic)
+    if len(topology.roots) != 3 or any(
+            topology.root(mfo).m_or_f() != 'MA' for mfo in synthetic):
+        raise AssertionError('Synthetic topology has the wrong roots.')
+    topology = timing_topology()
+    if [root.portless_name() for root in topology.roots] != [
+            'H1:SYS-TIMING_C_MA_A', 'L1:SYS-TIMING_C_MA_A']:
+        raise AssertionError('Installed topology has the wrong roots.')
+    if len(topology.descendants(topology.roots[0])) != 4:
+        raise AssertionError('Installed LHO Master should feed four FanOuts.')
+    # diffs should find moved slaves, and should agree with comparing the
+    # full channel lists.
+    old = lho_timing_system()
+    new = old[1:]
+    # move the slave on the first used port of the first FanOut to its first
+    # free port, and drop the Master.
+    ports = new[0].to_dict()
+    (first, empty) = (new[0].used_ports()[0],
+                      [i for i in range(PORTS_PER_MFO)
+                       if i not in new[0].used_ports()][0])
+    (ports['ports'][first], ports['ports'][empty]) = (
+        ports['ports'][empty], ports['ports'][first])
+    new[0] = MFO.from_dict(ports)
+    diff = TimingSystemDiff(old, new + synthetic[:2])
+    old_chs = set(ch for mfo in old for ch in mfo.iter_channels())
+    new_chs = set(ch for mfo in new + synthetic[:2]
+                  for ch in mfo.iter_channels())
+    if ((old[1].port(first), new[0].port(empty)) not in diff.moved_slaves or
+            diff.removed_mfos != old[:1] or
+            diff.added_mfos != synthetic[:2] or
+            set(diff.added_channels()) != new_chs - old_chs or
+            set(diff.removed_channels()) != old_chs - new_chs):
+        raise AssertionError('TimingSystemDiff disagrees with channel lists.')
+    # the history should hand back whichever snapshot was in effect, and a
+    # device's channels from every version of it in a time range.
+    import json
+    import tempfile
+    (handle, history_path) = tempfile.mkstemp(suffix='.json')
+    with os.fdopen(handle, 'w') as outfile:
+        json.dump([{'gps_start': 100, 'file': os.path.join(
+            SITE_DATA_DIR, SITE_DATA_FILES['LHO'])}], outfile)
+    try:
+        history = load_timing_history(history_path)
+    finally:
+        os.remove(history_path)
+    history.add(300, new)
+    history.add(200, old)
+    # looking at recent times shouldn't load older snapshots from disk.
+    if (history.channels_between(new[0], 300, 400) != new[0].get_channels()
+            or not isinstance(history.sources[0], str)):
+        raise AssertionError('TimingHistory loaded snapshots it didn\'t need.')
+    if (history.system_at(150) != old or history.system_at(299) != old or
+            history.system_at(10 ** 10) != new or
+            len(history.systems_between(150, 300)) != 2):
+        raise AssertionError('TimingHistory gave the wrong snapshot.')
+    try:
+        history.system_at(99)
+        raise AssertionError('TimingHistory gave a snapshot before its first.')
+    except ValueError:
+        pass
+    if (history.channels_between(old[1], 0, 10 ** 10) !=
+            list(unique(old[1].get_channels() + new[0].get_channels())) or
+            history.channels_between(old[1], 0, 300) != old[1].get_channels()
+            or len(history.device_between(old[1], 0, 10 ** 10)) != 2
+            or history.channels_between(old[0], 300, 400) != []
+            or history.channels_between(new[0].port(first), 300, 400) != []):
+        raise AssertionError('TimingHistory gave the wrong channels.')
+    # channel universes should hold each channel once, and find them by
+    # name or prefix just as a scan would.
+    channels = [ch for mfo in aligo_timing_system()
+                for ch in mfo.iter_channels()]
+    universe = channel_universe()
+    if list(universe) != sorted(set(channels)):
+        raise AssertionError('ChannelUniverse has the wrong channels.')
+    if (not all(universe.is_valid_channel(ch) for ch in channels[::97]) or
+            channels[0] + 'X' in universe):
+        raise AssertionError('ChannelUniverse membership is wrong.')
+    for prefix in ('', 'H1:SYS-TIMING_C_MA_A_PORT_2_', 'L1:SYS-TIMING_Y',
+                   universe.sorted_channels[-1], 'Z', 'H1:NOPE'):
+        if universe.with_prefix(prefix) != sorted(
+                set(ch for ch in channels if ch.startswith(prefix))):
+            raise AssertionError('Wrong channels with prefix: ' + prefix)
+    # pattern searches should only skip channels that can't match, however
+    # the literal prefix is found.
+    for (pattern, regex, prefix) in (
+            ('*_IRIGDIFF*', False, ''),
+            ('h1:sys-timing_c_ma_a_port_1?_*', False,
+             'H1:SYS-TIMING_C_MA_A_PORT_1'),
+            ('^L1:SYS-TIMING_X_FO_A_PORT_[0-9]+_SLAVE', True,
+             'L1:SYS-TIMING_X_FO_A_PORT_'),
+            ('^H1:SYS-TIMING_C_MA_AB?_', True, 'H1:SYS-TIMING_C_MA_A'),
+            ('^H1:SYS-TIMING_C_MA_A{1}_', True, 'H1:SYS-TIMING_C_MA_'),
+            ('^H1:SYS|^L1:SYS', True, ''),
+            ('_UP$', True, '')):
+        compiled = ChannelPattern(pattern, regex)
+        if compiled.prefix != prefix:
+            raise AssertionError('Wrong literal prefix for: ' + pattern)
+        if universe.search(pattern, regex) != [
+                ch for ch in universe if compiled.match(ch)]:
+            raise AssertionError('Search disagrees with a scan: ' + pattern)
+    # -g should give the same results as filtering the unfiltered query.
+    for argv in (['-g', '*_slave_cfc_*'], ['-q', 'cs', '-g', '*_PORT_1?_*'],
+                 ['-q', 'm', '-g', 'L1:*'], ['-c', 'a', '-g', '*_FO_B_*UP']):
+        globbed = list(query_results(parse_args(argv)))
+        compiled = ChannelPattern(argv[-1])
+        everything = query_results(parse_args(argv[:-2] + ['-g', '*']))
+        if not globbed or globbed != [ch for ch in everything
+                                      if compiled.match(ch)]:
+            raise AssertionError('Glob query gave the wrong results: '
+                                 + ' '.join(argv))
+    # every installed channel should resolve back to the device it came from.
+    for mfo in aligo_timing_system():
+        for ch in mfo.iter_own_channels():
+            if resolve_channel(ch).mfo != mfo:
+                raise AssertionError('Channel resolved to wrong MFO: ' + ch)
+        for slave in mfo.port():
+            if slave.dev_type() is not None:
+                for ch in slave.iter_own_channels():
+                    if resolve_channel(ch).slave != slave:
+                        raise AssertionError('Channel resolved to wrong '
+                                             'slave: ' + ch)
+    # the SQLite store should answer every query just as the in-memory
+    # models do, including the substring matching of used_ports.
+    import shutil
+    queries = [['-c', c, '-q', q] for c in ('i', 'a')
+               for q in ('c', 'cm', 'cs', 'm', 's')]
+    queries += [['-q', 's', '-i', 'l1', '-t', 'cfc'],
+                ['-c', 'a', '-l', 'x', '-p', '3'],
+                ['-q', 'cs', '-p', '1'],
+                ['-q', 'm', '-m', 'fo', '-d', 'b', '-t', 'fanout'],
+                ['-q', 'c', '-s', 'SYS-TIMING', '-i', 'h1', '-t', 'irigb']]
+    storedir = tempfile.mkdtemp()
+    try:
+        database = os.path.join(storedir, 'channels.db')
+        for argv in queries:
+            args = parse_args(argv)
+            if (list(query_database(database, args))
+                    != list(query_results(args))):
+                raise AssertionError('SQLite store disagrees with models: '
+                                     + ' '.join(argv))
+        # so should the binary snapshot.
+        cache = os.path.join(storedir, 'channels.snapshot')
+        snapshot = load_snapshot(cache)
+        for argv in queries:
+            args = parse_args(argv)
+            if list(snapshot.query(args)) != list(query_results(args)):
+                raise AssertionError('Snapshot disagrees with models: '
+                                     + ' '.join(argv))
+        snapshot.close()
+        # snapshots built from other data, or that can't be read, should be
+        # rebuilt when loaded.
+        last_updated = LAST_UPDATED
+        globals()['LAST_UPDATED'] = 'Never'
+        try:
+            build_snapshot(cache)
+        finally:
+            globals()['LAST_UPDATED'] = last_updated
+        stale = ChannelSnapshot(cache)
+        if stale.is_current():
+            raise AssertionError('Snapshot from other data seems current.')
+        stale.close()
+        # the first pass finds the stale snapshot, and the rest ones that
+        # are corrupt or cut short (including at a column boundary).
+        size = os.path.getsize(cache)
+        for damage in (None, b'not a snapshot', size // 2, size // 8 * 4,
+                       size - 1):
+            if isinstance(damage, bytes):
+                with open(cache, 'wb') as outfile:
+                    outfile.write(damage)
+            elif damage is not None:
+                with open(cache, 'r+b') as outfile:
+                    outfile.truncate(damage)
+            snapshot = load_snapshot(cache)
+            if not snapshot.is_current():
+                raise AssertionError('Snapshot was not rebuilt: '
+                                     + repr(damage))
+            snapshot.close()
+        # editing a site data file should make both stores out of date, even
+        # if nobody remembered to change LAST_UPDATED.
+        site_data_dir = SITE_DATA_DIR
+        globals()['SITE_DATA_DIR'] = os.path.join(storedir, 'data')
+        try:
+            shutil.copytree(site_data_dir, SITE_DATA_DIR)
+            build_database(database)
+            build_snapshot(cache)
+            edited = os.path.join(SITE_DATA_DIR, SITE_DATA_FILES['LLO'])
+            mtime = os.stat(edited).st_mtime_ns + 10**9
+            os.utime(edited, ns=(mtime, mtime))
+            snapshot = ChannelSnapshot(cache)
+            if snapshot.is_current():
+                raise AssertionError('Snapshot of edited data seems current.')
+            snapshot.close()
+            snapshot = load_snapshot(cache)
+            if snapshot.data != site_data_stamp():
+                raise AssertionError('Snapshot of edited data not rebuilt.')
+            snapshot.close()
+            conn = open_database(database)
+            data = conn.execute("SELECT value FROM meta WHERE key = 'data'")
+            if data.fetchone()[0] != site_data_stamp():
+                raise AssertionError('Store of edited data not rebuilt.')
+            conn.close()
+        finally:
+            globals()['SITE_DATA_DIR'] = site_data_dir
+    finally:
+        shutil.rmtree(storedir)
+    # a query server should give the same answers as a local query.
+    import socket
+    import threading
+    sockdir = tempfile.mkdtemp()
+    address = os.path.join(sockdir, 'geco_channels.sock')
+    server = make_query_server(address)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        argv = ['-q', 's', '-t', 'cfc', '-g', '*_Y_*']
+        local = list(query_results(parse_args(argv)))
+        if (list(query_server(address, argv)) != local
+                or query_server(address, argv, 'json') != local):
+            raise AssertionError('Query server disagrees with local query.')
+        # bad arguments and --help should be refused without harming the
+        # server.
+        for bad in (['-h'], ['-q', 'nope'], ['-o', 'stolen.txt']):
+            try:
+                query_server(address, bad)
+                raise AssertionError('Server accepted: ' + ' '.join(bad))
+            except ValueError:
+                pass
+        if list(query_server(address, argv)) != local:
+            raise AssertionError('Query server broke after a bad query.')
+        # a client that connects and then sends nothing shouldn't hold up
+        # anyone else.
+        stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stalled.connect(address)
+        try:
+            if list(query_server(address, argv, timeout=5)) != local:
+                raise AssertionError('Query server disagrees with local '
+                                     'query while another client stalls.')
+        finally:
+            stalled.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+    # a server that never answers should time out rather than hang.
+    silent = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    silent.bind(address)
+    silent.listen(1)
+    try:
+        query_server(address, argv, timeout=0.1)
+        raise AssertionError('Query to a silent server did not time out.')
+    except OSError:
+        pass
+    finally:
+        silent.close()
+        os.remove(address)
+    # results that are cut short, or that can't be checked for that, should
+    # be an error rather than a shorter list.
+    def answer(listener, reply):
+        (conn, _) = listener.accept()
+        request = conn.makefile('rb')
+        headers = dict(line.decode('ascii').strip().lower().split(': ', 1)
+                       for line in iter(request.readline, b'\r\n')
+                       if b': ' in line)
+        request.read(int(headers['content-length']))
+        conn.sendall(reply)
+        request.close()
+        conn.close()
+    ok = (b'HTTP/1.1 200 OK\r\nContent-Type: text/plain; charset=utf-8\r\n'
+          b'Transfer-Encoding: chunked\r\n\r\n5\r\nH1:A\n\r\n')
+    for reply in (ok + b'0\r\n\r\n', ok, ok + b'5\r\nH1:',
+                  b'HTTP/1.0 200 OK\r\n\r\nH1:A\n'):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(address)
+        listener.listen(1)
+        thread = threading.Thread(target=answer, args=(listener, reply))
+        thread.start()
+        try:
+            results = list(query_server(address, ['-q', 'm'], timeout=5))
+            if results != ['H1:A'] or reply != ok + b'0\r\n\r\n':
+                raise AssertionError('Accepted incomplete results: '
+                                     + repr(reply))
+        except OSError:
+            if reply == ok + b'0\r\n\r\n':
+                raise
+        finally:
+            thread.join()
+            listener.close()
+            os.remove(address)
+    os.rmdir(sockdir)
+    # live values should come back for every channel the backend knows,
+    # without going over the concurrency limit.
+    slaves = DevList(s for mfo in aligo_timing_system() for s in mfo.port())
+    cfcs = slaves.select(TimingSlave).by('dev_type=cfc')
+    channels = list(_channel_names(cfcs))
+    known = dict((ch, i) for (i, ch) in enumerate(channels[1:]))
+    backend = FakeBackend(known, batch_size=10, delay=0.001,
+                          hang=channels[-1:], fail=channels[10:11])
+    values = fetch_values(cfcs, backend, concurrency=4, timeout=0.05)
+    if backend.max_in_flight > 4:
+        raise AssertionError('Fetch went over its concurrency limit.')
+    # the first channel is unknown, the second batch fails, and the last
+    # batch times out.
+    expected = dict(known)
+    expected[channels[0]] = None
+    for ch in channels[10:20] + channels[(len(channels) - 1) // 10 * 10:]:
+        expected[ch] = None
+    if values != expected:
+        raise AssertionError('Fetched values differ from backend values.')
+    # a healthy system should have no mismatches, and a used port that has
+    # lost its link, or an unused port that has found one, should be caught.
+    healthy = {}
+    for mfo in aligo_timing_system():
+        used = mfo.used_ports()
+        for i in range(PORTS_PER_MFO):
+            prefix = mfo.portless_name() + '_PORT_' + str(i) + '_'
+            healthy[prefix + 'ACTIVE'] = int(i in used)
+            healthy[prefix + 'UP'] = int(i in used)
+            healthy[prefix + 'LOS'] = int(i not in used)
+    if health_snapshot(FakeBackend(healthy), concurrency=64).mismatches():
+        raise AssertionError('Healthy system reported mismatches.')
+    broken = dict(healthy)
+    broken['H1:SYS-TIMING_C_MA_A_PORT_2_LOS'] = 1
+    broken['H1:SYS-TIMING_C_MA_A_PORT_3_UP'] = 'On'
+    found = [(name, problems) for (name, _, problems) in health_snapshot(
+        FakeBackend(broken), concurrency=64).mismatches()]
+    if found != [('H1:SYS-TIMING_C_MA_A_PORT_2', ('LOS',)),
+                 ('H1:SYS-TIMING_C_MA_A_PORT_3', ('UP',))]:
+        raise AssertionError('Wrong health mismatches: ' + str(found))
+    # the columnar view should agree with the index, if NumPy is around.
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    if numpy is not None:
+        columns = devs.select(MFO).columns()
+        constraints = ('ifo=h1', 'location!=c', 'used_ports CONTAINS 1')
+        if columns.by(*constraints) != devs.select(MFO).by(*constraints):
+            raise AssertionError('Columnar query disagrees with index.')
+        # as with the index, name() should only be asked of slaves that
+        # passed the earlier constraints.
+        constraints = ('dev_type!=None', 'name CONTAINS CFC')
+        if (slaves.select(TimingSlave).columns().by(*constraints) !=
+                slaves.select(TimingSlave).by(*constraints)):
+            raise AssertionError('Columnar query on name() disagrees with '
+                                 'index.')
+    # serializing and deserializing is a good way to make sure all is well.
+    for d in aligo_timing_system():
+        # the parsed record should encode back to the canonical string
+        if MFO(d).record().encode() != d:
+            raise AssertionError('MFORecord did not round-trip: ' + str(d))
+        if MFO.from_json(d.to_json()) != d:
+            raise AssertionError(('Serializing and deserializing changed '
+                                  'representation of MFO: ' + str(d) + ' vs. '
+                                  + str(MFO.from_json(d.to_json()))))
+        # make sure we catch bad description and dev_type input in our
+        # deserializer
+        for bad_char in RESERVED_CHARS:
+            dic1 = d.to_dict()
+            dic2 = d.to_dict()
+            dic1['ports'][0]['dev_type'] += bad_char + 'stuff'
+            dic2['ports'][0]['description'] += bad_char + 'stuff'
+            try:
+                MFO.from_dict(dic1)
+                raise AssertionError(('Bad character in dev_type allowed '
+                                      'through from_dict method: ' + bad_char))
+            except ValueError:
+                # a ValueError was thrown, as desired.
+                pass
+            try:
+                MFO.from_dict(dic2)
+                raise AssertionError(('Bad character in description allowed '
+                                      'through from_dict method: ' + bad_char))
+            except ValueError:
+                # a ValueError was thrown, as desired.
+                pass
+    return True
+
+def write_lines(lines, outfile, delimiter='\n', batch_size=4096):
+    """Write each string in lines to outfile, followed by delimiter. Lines are
+    joined into batches of batch_size so that only one write is made per
+    batch, which is much faster than printing them one by one when piping
+    large channel lists into other tools."""
+    lines = iter(lines)
+    while True:
+        batch = list(itertools.islice(lines, batch_size))
+        if len(batch) == 0:
+            break
+        outfile.write(delimiter.join(batch) + delimiter)
+    outfile.flush()
+
+# if running from the command line, we should run this stuff
+def argument_parser():
+    """Return the parser for command line arguments."""
+    import argparse
+    parser = argparse.ArgumentParser(description=(DESC + 
+                                     'When called from the command line, '
+                                     'query against channel names '
+                                     'used by the aLIGO timing system and '
+                                     'return a newline-delimited list of '
+                                     'matching channel names.'),
+                                     epilog=('NOTE: queries will currently '
+                                             'only return results related to '
+                                             'the Timing Distribution System. '
+                                             'Timing Diagnostic System '
+                                             'channels will be added in a '
+                                             'future release. This includes '
+                                             'ADC channels that are part of '
+                                             'the CAL subsystem.'))
+    parser.add_argument('-c','--configuration',
+                        help=('Which system configuration should channel name '
+                              'lists be drawn from? "i" indicates the actual '
+                              'system installation, so that channels returned '
+                              'will correspond to actual, in use devices. "a" '
+                              'indicates all possible permutations of slave '
+                              'device connections for a given MFO '
+                              'configuration, so that any possible '
+                              'rearrangement of slave module connections will '
+                              'be accounted for in the final channel list. '
+                              'DEFAULT: i'),
+                        choices=['i','a'], default='i')
+    parser.add_argument('-i','--ifo',
+                        help=('Interferometer; "h1" is Hanford, "l1" is '
+                             'Livingston. DEFAULT: *'),
+                        choices=['h1','l1','*'], default='*')
+    parser.add_argument('-s','--subsystem',
+                        help=('Most timing belongs to "SYS-TIMING", but some '
+                             'channels are in other subsystems. DEFAULT: *'),
+                        choices=['SYS-TIMING','*'], default='*')
+    parser.add_argument('-l','--location',
+                        help=('Location; "c" is corner station, "x" is X end '
+                             'station, "y" is Y end station. DEFAULT: *'),
+                        choices=['c','x','y','*'], default='*')
+    parser.add_argument('-m','--master_or_fanout',
+                        help=('Is this device connected to a Master or FanOut '
+                             'board? "ma" specifies a Master, "fo" a FanOut.'
+                             'DEFAULT: *'),
+                        choices=['ma','fo','*'], default='*')
+    parser.add_argument('-d','--device_id',
+                        help=('"a", "b"... etc. specifies which FanOut (or '
+                             'Master) this device connects to (since there '
+                             'can be multiple FanOuts at a given location.'
+                             'DEFAULT: *'),
+                        choices=['a','b','c','*'], default='*')
+    parser.add_argument('-p','--port_number',
+                        help=('The port number on the MFO to which this device '
+                             'connects. DEFAULT: *'),
+                        choices=[str(p) for p in range(PORTS_PER_MFO)] + ['*'],
+                        default='*')
+    parser.add_argument('-t','--dev_type',
+                        help=('The device type. IRIG-B Module (irigb), '
+                             'RFOscillator/oscillator locking (xolock), '
+                             'Slave/DuoTone assembly (duotone), '
+                             'Timing Comparator Module (cfc), or '
+                             'a fanout module (fanout). DEFAULT: *'),
+                        choices=['irigb','xolock','duotone','cfc',
+                                 'fanout','*'],
+                        default='*')
+    parser.add_argument('-q','--query_type',
+                        help=('What type of query is this? Can return a list '
+                              'of all matching channels (c), a list of only '
+                              'MFO-specific matching channels (cm), a list of '
+                              'only Timing-Slave-specific matching channels '
+                              '(cs), a list of descriptive strings for '
+                              'matching MFO devices (m), or a list of '
+                              'descriptive strings for matching Timing Slave '
+                              'devices (s). DEFAULT: c'),
+                        choices=['c','cm','cs','m','s'], default='c')
+    parser.add_argument('-g','--glob',
+                        help=('Only return results matching this glob '
+                              'pattern, e.g. "*_IRIGDIFF*" (quote it to keep '
+                              'the shell from expanding it). Matching is case '
+                              'insensitive. DEFAULT: *'),
+                        default='*')
+    parser.add_argument('--database',
+                        help=('Answer the query from an SQLite store at this '
+                              'path instead of building the site models in '
+                              'memory. The store is created (or rebuilt, if '
+                              'it is out of date) automatically.'),
+                        default=None)
+    parser.add_argument('--cache',
+                        help=('Answer the query from a binary snapshot of '
+                              'the channel tables at this path instead of '
+                              'building the site models in memory. The '
+                              'snapshot is created (or rebuilt, if it is out '
+                              'of date) automatically.'),
+                        default=None)
+    parser.add_argument('--build-cache',
+                        help=('Build a binary snapshot of the channel tables '
+                              'at this path for use with --cache, then exit.'),
+                        default=None)
+    parser.add_argument('-o','--output',
+                        help=('Write results to this file instead of to '
+                              'stdout. DEFAULT: stdout'),
+                        default=None)
+    parser.add_argument('-0','--null',
+                        help=('Separate results with NUL characters instead '
+                              'of newlines, for use with e.g. "xargs -0".'),
+                        action='store_true')
+    parser.add_argument('--serve',
+                        help=('Keep the site models and query indexes in '
+                              'memory and answer queries from clients over '
+                              'HTTP at this address, either HOST:PORT or the '
+                              'path of a Unix socket, until interrupted.'),
+                        default=None)
+    parser.add_argument('--connect',
+                        help=('Send the query to a server started with '
+                              '--serve at this address instead of answering '
+                              'it here, falling back to answering it here if '
+                              'the server can\'t be reached. DEFAULT: the '
+                              'value of $' + SERVER_ENVIRONMENT_VARIABLE +
+                              ', if set.'),
+                        default=None)
+    return parser
+
+def parse_args(argv=None):
+    """Parse command line arguments (from sys.argv, unless a list of
+    arguments is given)."""
+    return argument_parser().parse_args(argv)
+
+def main():
+    args = parse_args()
+    if args.build_cache is not None:
+        build_snapshot(args.build_cache)
+        return
+    if args.serve is not None:
+        serve(args.serve)
+        return
+    address = args.connect
+    if address is None:
+        address = os.environ.get(SERVER_ENVIRONMENT_VARIABLE) or None
+    found = None
+    if (address is not None and args.database is None
+            and args.cache is None):
+        try:
+            found = query_server(address, query_argv(args))
+        except (OSError, ValueError) as err:
+            # dashboards should keep working if the server goes away.
+            sys.stderr.write('Could not query server at {}, answering '
+                             'locally: {}\n'.format(address, err))
+    if found is None:
+        found = query_results(args)
+    delimiter = '\0' if args.null else '\n'
+    if args.output is None:
+        try:
+            write_lines(found, sys.stdout, delimiter)
+        except BrokenPipeError:
+            # whatever we were piped into (e.g. head) has stopped reading.
+            # point stdout at devnull so that the flush at exit doesn't fail
+            # again, and exit quietly.
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            sys.exit(1)
+    else:
+        with open(args.output, 'w') as outfile:
+            write_lines(found, outfile, delimiter)
+
+if __name__ == "__main__":
+    main()
+
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+"""Benchmarks for the query and channel-generation hot paths of
+geco_channels.py: MFO.from_dict, MFO.to_json/from_json, get_channels() over
+the installed system, all_possible_channels(), DevListSelector.by() with the
+full command line constraint set, building a TimingTopology, and end-to-end
+main() for every --query_type and --configuration. The library benchmarks are
+also run on synthetic systems of 100 to 10,000 MFOs to expose bad scaling.
+
+Results can be saved as JSON with -o and compared against an earlier run
+with -c, in which case any benchmark that got slower by more than the given
+tolerance is reported and the script exits with an error.
+"""
+
+import io
+import json
+import os
+import sys
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+import geco_channels as geco
+
+SCALES = [100, 1000, 10000]
+
+def constraints(system):
+    """Return the MFO and slave constraints that main() would apply for a
+    query with every option set, picking values from the first MFO in the
+    given system (and its first slave), so that every constraint is applied
+    to some devices whatever system is being benchmarked."""
+    mfo = system[0]
+    slave = next(s for s in mfo.port() if s.dev_type() is not None)
+    mfo_constraints = (
+        'ifo=' + mfo.ifo(), 'subsystem=' + mfo.subsystem(),
+        'location=' + mfo.location(), 'm_or_f=' + mfo.m_or_f(),
+        'dev_id=' + mfo.dev_id(), 'slave_types CONTAINS ' + slave.dev_type(),
+        'used_ports CONTAINS ' + str(slave.port_number()))
+    slave_constraints = ('dev_type!=None',
+                         'port_number=' + str(slave.port_number()),
+                         'dev_type=' + slave.dev_type())
+    return (mfo_constraints, slave_constraints)
+
+def clear_caches():
+    """Throw away everything geco_channels.py keeps between calls (the site
+    models and everything built from them, and the memoized channel
+    expansions), so that each timed call starts cold."""
+    geco.clear_timing_system_cache()
+    geco._expand_channels.cache_clear()
+
+def run_main(argv):
+    """Run main() with the given command line arguments from a cold start,
+    as a fresh process would, throwing away its output."""
+    clear_caches()
+    (old_argv, old_stdout) = (sys.argv, sys.stdout)
+    sys.argv = ['geco_channels.py'] + argv
+    sys.stdout = io.StringIO()
+    try:
+        geco.main()
+    finally:
+        (sys.argv, sys.stdout) = (old_argv, old_stdout)
+
+def library_benchmarks(system):
+    """Return a list of (name, function) pairs exercising the library on the
+    given list of MFOs."""
+    dicts = [mfo.to_dict() for mfo in system]
+    jsons = [mfo.to_json() for mfo in system]
+    (mfo_constraints, slave_constraints) = constraints(system)
+    def by():
+        geco.DevList(system).select(geco.MFO).by(*mfo_constraints)
+    def get_channels():
+        # fresh copies and an empty expansion cache, so that we measure
+        # parsing and expansion rather than cache hits.
+        geco._expand_channels.cache_clear()
+        return [geco.MFO(str(mfo)).get_channels() for mfo in system]
+    def by_slaves():
+        slaves = geco.DevList()
+        for mfo in system:
+            slaves += mfo.port()
+        slaves.select(geco.TimingSlave).by(*slave_constraints)
+    return [
+        ('MFO.from_dict', lambda: [geco.MFO.from_dict(d) for d in dicts]),
+        ('MFO.to_json', lambda: [mfo.to_json() for mfo in system]),
+        ('MFO.from_json', lambda: [geco.MFO.from_json(j) for j in jsons]),
+        ('get_channels', get_channels),
+        ('all_possible_channels',
+         lambda: geco.all_possible_channels(system)),
+        ('iter_all_possible_channels',
+         lambda: list(geco.iter_all_possible_channels(system))),
+        ('DevListSelector.by (MFO)', by),
+        ('DevListSelector.by (slaves)', by_slaves),
+        ('TimingTopology', lambda: geco.TimingTopology(system))
+    ]
+
+def main_benchmarks():
+    """Return a list of (name, function) pairs running main() end to end,
+    with cold caches, for every query type and configuration."""
+    res = []
+    for configuration in ['i', 'a']:
+        for query_type in ['c', 'cm', 'cs', 'm', 's']:
+            argv = ['-c', configuration, '-q', query_type]
+            res.append(('main ' + ' '.join(argv),
+                        lambda argv=argv: run_main(argv)))
+    return res
+
+def measure(func):
+    """Return the best time per call of func in seconds, out of three trials
+    that each run it enough times to take at least 0.2 seconds."""
+    timer = timeit.Timer(func)
+    (number, _) = timer.autorange()
+    return min(timer.repeat(3, number)) / number
+
+def parse_args():
+    """Parse command line arguments."""
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-o', '--output',
+                        help='Write results to this JSON file.')
+    parser.add_argument('-c', '--compare',
+                        help=('Compare results against those in this JSON '
+                              'file, written by an earlier run with -o.'))
+    parser.add_argument('-t', '--tolerance', type=float, default=0.25,
+                        help=('With -c, the fractional slowdown that counts '
+                              'as a regression. DEFAULT: 0.25'))
+    parser.add_argument('-s', '--scales', type=int, nargs='*',
+                        default=SCALES,
+                        help=('Numbers of synthetic MFOs to benchmark the '
+                              'library with. DEFAULT: ' +
+                              ' '.join(str(s) for s in SCALES)))
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    installed = geco.aligo_timing_system()
+    suites = [(len(installed), library_benchmarks(installed))]
+    suites += [(n, library_benchmarks(geco.synthetic_timing_system(n)))
+               for n in args.scales]
+    suites += [(len(installed), main_benchmarks())]
+    results = []
+    for (n_mfos, benchmarks) in suites:
+        for (name, func) in benchmarks:
+            seconds = measure(func)
+            results.append({'name': name, 'n_mfos': n_mfos,
+                            'seconds': seconds})
+            print('{:<32} {:>6} MFOs {:>12.3f} ms'.format(name, n_mfos,
+                                                          seconds * 1000))
+    report = {
+        'version': str(geco.__version__),
+        'last_updated': geco.LAST_UPDATED,
+        'python': sys.version.split()[0],
+        'results': results
+    }
+    if args.output is not None:
+        with open(args.output, 'w') as outfile:
+            json.dump(report, outfile, indent=4, separators=(',', ': '))
+    if args.compare is not None:
+        with open(args.compare) as infile:
+            old = dict(((r['name'], r['n_mfos']), r['seconds'])
+                       for r in json.load(infile)['results'])
+        regressions = []
+        for r in results:
+            key = (r['name'], r['n_mfos'])
+            if key in old and r['seconds'] > old[key] * (1 + args.tolerance):
+                regressions.append((key, old[key], r['seconds']))
+        for ((name, n_mfos), before, after) in regressions:
+            print('REGRESSION: {} ({} MFOs): {:.3f} ms -> {:.3f} ms'.format(
+                name, n_mfos, before * 1000, after * 1000))
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
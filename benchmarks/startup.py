@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Check that the geco_channels.py command line starts up quickly. Runs
+
+    python geco_channels.py -q m
+
+several times, then once more with -X importtime, reports the median
+wall-clock time along with the modules that took longest to import, and exits
+with an error if the median goes over the millisecond budget or if any of the
+modules that geco_channels.py only imports on demand were loaded anyway. _geco_channels.py is byte-compiled
+first, as it would be once installed, so the runs don't measure compiling it.
+"""
+
+import os
+import py_compile
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(os.path.dirname(HERE), 'geco_channels.py')
+MODULE = os.path.join(os.path.dirname(HERE), '_geco_channels.py')
+# the budget for a plain 'geco_channels.py -q m' run, in milliseconds: what
+# the original single-file script (version 0.5) took to answer it.
+STARTUP_BUDGET_MS = 55
+# modules that should only be imported by the features that need them (so
+# this check is only meaningful for queries that don't use --database,
+# --cache, --serve or --connect).
+DEFERRED_MODULES = ['array', 'mmap', 'sqlite3', 'numpy', 'http.client',
+                    'http.server', 'socketserver', 'asyncio']
+
+def run_once(args):
+    """Run the script once, returning the wall-clock time in milliseconds."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, SCRIPT] + args,
+                   stdout=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000
+
+def import_times(args):
+    """Run the script once with -X importtime (which slows it down, so this
+    run isn't timed), returning a dict of cumulative import times in
+    microseconds for each top-level import."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', SCRIPT] + args,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True)
+    imports = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        (_, cumulative, name) = line.split('|')
+        imports[name.strip()] = int(cumulative)
+    return imports
+
+def parse_args():
+    """Parse command line arguments."""
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--repeat', type=int, default=11,
+                        help='How many times to run the script. DEFAULT: 11')
+    parser.add_argument('-b', '--budget', type=float,
+                        default=STARTUP_BUDGET_MS,
+                        help=('Fail if the median run takes longer than this '
+                              'many milliseconds. DEFAULT: '
+                              + str(STARTUP_BUDGET_MS)))
+    parser.add_argument('args', nargs='*', default=['-q', 'm'],
+                        help=('Arguments to pass to geco_channels.py. '
+                              'DEFAULT: -q m'))
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    py_compile.compile(MODULE, doraise=True)
+    median = statistics.median(run_once(args.args)
+                               for _ in range(args.repeat))
+    imports = import_times(args.args)
+    print('geco_channels.py ' + ' '.join(args.args))
+    print('median wall time: {:.1f} ms (budget {:.1f} ms)'.format(
+        median, args.budget))
+    print('slowest imports (cumulative, ms):')
+    for name in sorted(imports, key=imports.get, reverse=True)[:10]:
+        print('    {:<30} {:.2f}'.format(name, imports[name] / 1000.))
+    failed = False
+    loaded = [m for m in DEFERRED_MODULES if m in imports]
+    if loaded:
+        print('FAIL: deferred modules were imported: ' + ', '.join(loaded))
+        failed = True
+    if median > args.budget:
+        print('FAIL: over the startup budget.')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()